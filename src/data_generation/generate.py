@@ -1,14 +1,38 @@
 import os
-import json
 import random
+import time
+import hashlib
+import asyncio
+import argparse
+import itertools
 
+import orjson
 from dotenv import load_dotenv
-from langchain_core.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
+from openai import APIConnectionError, InternalServerError, OpenAI, RateLimitError
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
 
 # Load environment variables from .env file
 load_dotenv()
 
+MODEL_NAME = "gpt-4o-mini"
+TEMPERATURE = 0.8  # Increased temperature for more variation
+
+# Shared client so every listing request reuses the same pooled connections. No custom
+# httpx.AsyncClient is passed in: one created here would be bound to the first event loop
+# and break when asyncio.run is called again.
+llm = ChatOpenAI(
+    model=MODEL_NAME,
+    temperature=TEMPERATURE,
+    api_key=os.getenv("OPENAI_API_KEY"),
+    base_url=os.getenv("OPENAI_BASE_URL"),
+    # A plain number: langchain-openai caches its default HTTP clients keyed on the
+    # timeout, so an (unhashable) httpx.Timeout fails at import
+    timeout=60.0,
+    # Retries are handled by tenacity on _stream_completion alone
+    max_retries=0,
+)
+
 categories: dict[str, dict] = {
     "family_areas": {
         "description": "2-4 bedrooms in family-friendly areas - good schools, parks, family pubs",
@@ -42,94 +66,217 @@ categories: dict[str, dict] = {
     },
 }
 
+# Static instructions shared by every listing prompt; nothing is interpolated here.
+# At roughly 200 tokens this is well under OpenAI's 1024-token prompt caching minimum,
+# so it is not cached today - it only keeps the prompt layout cache-friendly if it grows.
+_PROMPT_PREFIX = """You are a real estate agent in London.
+
+Generate a realistic London property listing for the category described at the end of this prompt.
+
+The listing should contain the following sections:
+
+Basic Info: area/postcode, price (£), bedrooms, bathrooms, size (sqft), property type
+Property Description: 150-200 words, highlight unique features and period details
+Area Description: 100-150 words, transport links, local amenities, community vibe
+
+Constraints:
+- Realistic London pricing for the area and property type
+- Include transport connections (tube lines, bus routes, rail stations)
+- Mention specific London amenities (parks, markets, pubs, cultural attractions)
+- Rich descriptive language optimized for semantic search
+- Make each listing unique with different features, prices, and characteristics
+
+"""
+
 def prompt_template(category: str, variation_instruction: str = "") -> str:
-    return PromptTemplate.from_template(
-        """
-        You are a real estate agent in London.
-
-        Generate a realistic London property listing for the "{category}" category.
-
-        The category could be described as:
-        {description}
-
-        {variation_instruction}
-
-        The listing should contain the following sections:
-
-        Basic Info: area/postcode, price (£), bedrooms, bathrooms, size (sqft), property type
-        Property Description: 150-200 words, highlight unique features and period details
-        Area Description: 100-150 words, transport links, local amenities, community vibe
-
-        Constraints:
-        - Realistic London pricing for the area and property type
-        - Include transport connections (tube lines, bus routes, rail stations)
-        - Mention specific London amenities (parks, markets, pubs, cultural attractions)
-        - Rich descriptive language optimized for semantic search
-        - Make each listing unique with different features, prices, and characteristics
-        """
-    ).format(
-        category=category,
-        description=categories[category]["description"],
-        variation_instruction=variation_instruction
-    )
+    parts = [
+        _PROMPT_PREFIX,
+        "Category: ", category,
+        "\nDescription: ", categories[category]["description"],
+        "\nSpecifics: ", variation_instruction,
+        "\n",
+    ]
+    return "".join(parts)
+
+def variation_instruction_for(location: str, property_type: str) -> str:
+    return f"IMPORTANT: This listing must be specifically located in {location} and must be a {property_type}. Use this specific area and property type throughout the listing."
+
+def plan_variations(category: str, count: int = 4, seed: int | None = None) -> list[tuple[str, str]]:
+    """Pick the (location, property type) pair for each listing in a category
+
+    Passing a seed makes the plan reproducible, which also lets re-runs hit the listing cache.
+    """
+    rng = random.Random(None if seed is None else f"{seed}:{category}")
+    locations = categories[category]["locations"]
+    property_types = categories[category]["property_types"]
+
+    # Shuffle for randomness, then cycle through both lists to ensure variety
+    locations = rng.sample(locations, k=len(locations))
+    property_types = rng.sample(property_types, k=len(property_types))
+    return list(itertools.islice(zip(itertools.cycle(locations), itertools.cycle(property_types)), count))
+
+# Generated listings are cached on disk keyed by their exact prompt
+LISTING_CACHE_DIR = "data/.listing_cache"
+
+def _listing_cache_path(prompt: str) -> str:
+    # Model settings are part of the key so changing them invalidates old entries
+    key = hashlib.sha256(f"{MODEL_NAME}|{TEMPERATURE}|{prompt}".encode("utf-8")).hexdigest()
+    return os.path.join(LISTING_CACHE_DIR, f"{key}.txt")
+
+# Cap the number of in-flight LLM requests so a full run stays under the rate limits
+MAX_CONCURRENT_REQUESTS = 8
+
+# Back off and retry on 429s and transient failures rather than failing the whole gather;
+# the semaphore slot is released while waiting so other requests keep the pipe full.
+# This is the only retry layer: the client is built with max_retries=0 so the SDK's own
+# retries don't multiply the attempts made under sustained rate limiting.
+@retry(
+    wait=wait_random_exponential(min=1, max=30),
+    stop=stop_after_attempt(6),
+    retry=retry_if_exception_type((RateLimitError, APIConnectionError, InternalServerError)),
+    reraise=True,
+)
+async def _stream_completion(prompt: str, semaphore: asyncio.Semaphore) -> str:
+    # Stream the completion so concurrent requests interleave token by token
+    chunks = []
+    async with semaphore:
+        async for chunk in llm.astream(prompt):
+            chunks.append(chunk.content)
+    return "".join(chunks)
 
-def generate_listing_for_category(category: str, location: str = None, property_type: str = None) -> str:
+async def generate_listing_for_category(category: str, location: str = None, property_type: str = None, use_cache: bool = True, semaphore: asyncio.Semaphore | None = None) -> str:
     # Select specific location and property type if not provided
     if location is None:
         location = random.choice(categories[category]["locations"])
     if property_type is None:
         property_type = random.choice(categories[category]["property_types"])
 
-    variation_instruction = f"IMPORTANT: This listing must be specifically located in {location} and must be a {property_type}. Use this specific area and property type throughout the listing."
+    prompt = prompt_template(category, variation_instruction_for(location, property_type))
 
-    prompt = prompt_template(category, variation_instruction)
-    llm = ChatOpenAI(
-        model="gpt-4o-mini",
-        temperature=0.8,  # Increased temperature for more variation
+    cache_path = _listing_cache_path(prompt)
+    if use_cache and os.path.exists(cache_path):
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    listing = await _stream_completion(prompt, semaphore)
+
+    os.makedirs(LISTING_CACHE_DIR, exist_ok=True)
+    with open(cache_path, "w", encoding="utf-8") as f:
+        f.write(listing)
+    return listing
+
+async def generate_listings_for_category(category: str, count: int = 4, use_cache: bool = True, seed: int | None = None, semaphore: asyncio.Semaphore | None = None) -> list[str]:
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    tasks = []
+    for i, (location, property_type) in enumerate(plan_variations(category, count, seed)):
+        print(f"Generating {category} listing {i+1}/{count}: {location} - {property_type}")
+        tasks.append(generate_listing_for_category(category, location, property_type, use_cache, semaphore))
+
+    # Run all listings for the category concurrently
+    return list(await asyncio.gather(*tasks))
+
+async def generate_listings(use_cache: bool = True, seed: int | None = None):
+    # Generate every category concurrently; the semaphore bounds the overall fan-out.
+    # Created per call so the semaphore belongs to the running event loop.
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    results = await asyncio.gather(
+        *[generate_listings_for_category(category, use_cache=use_cache, seed=seed, semaphore=semaphore) for category in categories]
+    )
+    return dict(zip(categories, results))
+
+def generate_listings_batch(count: int = 4, poll_interval: float = 30.0, seed: int | None = None) -> dict[str, list[str]]:
+    """Generate all listings through the OpenAI Batch API.
+
+    Cheaper than per-request calls and not rate limited, but can take anywhere
+    up to the 24h completion window - only suitable for offline regeneration.
+    """
+    client = OpenAI(
         api_key=os.getenv("OPENAI_API_KEY"),
         base_url=os.getenv("OPENAI_BASE_URL"),
     )
-    response = llm.invoke(prompt)
-    return response.content
 
-def generate_listings_for_category(category: str, count: int = 4) -> list[str]:
-    listings = []
-    locations = categories[category]["locations"].copy()
-    property_types = categories[category]["property_types"].copy()
+    requests = []
+    for category in categories:
+        for i, (location, property_type) in enumerate(plan_variations(category, count, seed)):
+            prompt = prompt_template(category, variation_instruction_for(location, property_type))
+            requests.append({
+                "custom_id": f"{category}:{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": MODEL_NAME,
+                    "temperature": TEMPERATURE,
+                    "messages": [{"role": "user", "content": prompt}],
+                },
+            })
 
-    # Shuffle to add randomness
-    random.shuffle(locations)
-    random.shuffle(property_types)
+    payload = b"\n".join(orjson.dumps(request) for request in requests)
+    batch_file = client.files.create(file=("listings_batch.jsonl", payload), purpose="batch")
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    print(f"Submitted batch {batch.id} with {len(requests)} listing requests")
 
-    # Ensure we get variety by cycling through locations and property types
-    for i in range(count):
-        # Rotate through locations to ensure variety
-        location = locations[i % len(locations)]
-        property_type = property_types[i % len(property_types)]
+    while batch.status not in ("completed", "failed", "expired", "cancelled"):
+        time.sleep(poll_interval)
+        batch = client.batches.retrieve(batch.id)
+        print(f"Batch {batch.id} status: {batch.status}")
 
-        print(f"Generating {category} listing {i+1}/{count}: {location} - {property_type}")
-        listing = generate_listing_for_category(category, location, property_type)
-        listings.append(listing)
+    if batch.status != "completed" or not batch.output_file_id:
+        raise RuntimeError(f"Batch {batch.id} finished with status '{batch.status}'")
 
-    return listings
+    results: dict[str, dict[int, str]] = {category: {} for category in categories}
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        item = orjson.loads(line)
+        category, index = item["custom_id"].rsplit(":", 1)
+        if item.get("error") or item["response"]["status_code"] != 200:
+            print(f"Warning: batch request {item['custom_id']} failed - skipping")
+            continue
+        results[category][int(index)] = item["response"]["body"]["choices"][0]["message"]["content"]
 
-def generate_listings():
-    listings = {}
-    for category in categories:
-        listings[category] = generate_listings_for_category(category)
-    return listings
+    return {
+        category: [listings[i] for i in sorted(listings)]
+        for category, listings in results.items()
+    }
 
 
 def save_listings(listings: dict[str, list[str]], filename: str):
-    with open(filename, "w") as f:
-        json.dump(listings, f, indent=2)
+    with open(filename, "wb") as f:
+        f.write(orjson.dumps(listings, option=orjson.OPT_INDENT_2))
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic London property listings")
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Submit all prompts through the OpenAI Batch API (cheaper, but may take hours)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Ignore listings cached in {LISTING_CACHE_DIR} and call the LLM for every prompt",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed for choosing locations and property types, for reproducible datasets",
+    )
+    args = parser.parse_args()
+
     # Ensure data directory exists
     os.makedirs("data", exist_ok=True)
 
     print("Starting listing generation...")
-    listings = generate_listings()
+    if args.batch:
+        listings = generate_listings_batch(seed=args.seed)
+    else:
+        listings = asyncio.run(generate_listings(use_cache=not args.no_cache, seed=args.seed))
     save_listings(listings, "data/listings.json")
     print(f"Generated {sum(len(category_listings) for category_listings in listings.values())} listings saved to data/listings.json")
 
@@ -6,183 +6,316 @@ This demo showcases the PropertyPreferenceCollector with different buyer persona
 and includes an interactive mode for testing.
 """
 
-from typing import Dict, List
+import io
+import sys
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, TextIO, Tuple
+
+import openai
 from personalization.personalize import ListingPersonalizer
-from search.search import PropertyPreferenceCollector
+from search.search import BuyerPreferences, PropertyPreferenceCollector
 from vector_store.store import PropertyVectorStore
 
 
+# Scripted answers for each built-in persona, in the order the collector asks its questions
+_PERSONA_RESPONSES: Dict[str, List[str]] = {
+    "Family Areas": [
+        "terraced house",  # property type
+        "£900,000 to £1,200,000",  # budget
+        "3 bedrooms, but 4 would be great",  # bedrooms
+        "2 bathrooms, en-suite would be nice",  # bathrooms
+        "Yes, we need a garden for the kids",  # outdoor space
+        "Richmond or Wimbledon, somewhere family-friendly",  # areas
+        "Central London, about 45 minutes is acceptable",  # commute
+        "Rail or tube, need reliable transport",  # transport
+        "Good schools, parks, family pubs, safe area",  # amenities
+        "Established family neighborhoods",  # community
+        "Off-street parking, period features would be lovely",  # features
+        "Good schools, garden, transport links",  # priorities
+        "Yes, that's all correct"  # confirmation
+    ],
+    "Young Professionals": [
+        "modern flat",  # property type
+        "£450,000 to £550,000",  # budget
+        "1 bedroom, maybe 2 if budget allows",  # bedrooms
+        "1 bathroom is fine",  # bathrooms
+        "A balcony would be nice but not essential",  # outdoor space
+        "Clapham, Islington, or Shoreditch",  # areas
+        "Central London, ideally under 30 minutes",  # commute
+        "Tube access is essential, Northern or Central line preferred",  # transport
+        "Cafes, restaurants, nightlife, gyms nearby",  # amenities
+        "Trendy areas with good nightlife",  # community
+        "Modern kitchen, good internet, secure building",  # features
+        "Transport links, nightlife, modern amenities",  # priorities
+        "Yes, sounds perfect"  # confirmation
+    ],
+    "Luxury Central": [
+        "period apartment or penthouse",  # property type
+        "£2,500,000 to £3,500,000",  # budget
+        "3 bedrooms minimum",  # bedrooms
+        "2-3 bathrooms, master en-suite essential",  # bathrooms
+        "Private terrace or garden would be perfect",  # outdoor space
+        "Kensington, Chelsea, or Mayfair",  # areas
+        "Central London, but comfort is more important than time",  # commute
+        "Quality transport, but happy to use taxis",  # transport
+        "High-end restaurants, boutique shopping, cultural attractions",  # amenities
+        "Prestigious central locations",  # community
+        "Period features, high-end finishes, concierge service",  # features
+        "Location, luxury finishes, period character",  # priorities
+        "Yes, exactly what I'm looking for"  # confirmation
+    ],
+    "Up and Coming Areas": [
+        "Victorian conversion or terraced house",  # property type
+        "£400,000 to £650,000",  # budget
+        "2-3 bedrooms",  # bedrooms
+        "1-2 bathrooms",  # bathrooms
+        "Small garden or courtyard would be great",  # outdoor space
+        "Peckham, Forest Hill, or Walthamstow",  # areas
+        "Central London, up to 45 minutes is okay",  # commute
+        "Good transport links, Overground or tube",  # transport
+        "Local cafes, markets, developing arts scene",  # amenities
+        "Up-and-coming areas with potential",  # community
+        "Character features, potential for improvement",  # features
+        "Good transport, value for money, character",  # priorities
+        "Yes, that captures what I want"  # confirmation
+    ],
+    "First Time Buyer": [
+        "studio flat or 1-bed flat",  # property type
+        "£250,000 to £350,000",  # budget
+        "Studio or 1 bedroom",  # bedrooms
+        "1 bathroom is sufficient",  # bathrooms
+        "Not essential, but a small balcony would be nice",  # outdoor space
+        "Croydon, Woolwich, or outer London zones",  # areas
+        "Central London, willing to commute up to an hour",  # commute
+        "Regular transport links, doesn't have to be tube",  # transport
+        "Basic amenities, shops, maybe a gym nearby",  # amenities
+        "Friendly areas, good for first-time buyers",  # community
+        "Help to Buy eligible, modern amenities, secure",  # features
+        "Affordability, transport links, safe area",  # priorities
+        "Yes, perfect for getting on the ladder"  # confirmation
+    ],
+    "Unique London Properties": [
+        "warehouse conversion or loft apartment",  # property type
+        "£1,000,000 to £1,500,000",  # budget
+        "2-3 bedrooms",  # bedrooms
+        "2 bathrooms, modern fittings",  # bathrooms
+        "Unique outdoor space, roof terrace maybe",  # outdoor space
+        "King's Cross, Canary Wharf, or Bermondsey",  # areas
+        "Central London or Canary Wharf",  # commute
+        "Good connections, DLR or tube",  # transport
+        "Trendy restaurants, cultural attractions, galleries",  # amenities
+        "Creative areas with unique character",  # community
+        "Industrial character, high ceilings, unique features",  # features
+        "Unique character, location, architectural interest",  # priorities
+        "Yes, that's exactly the kind of unique property I want"  # confirmation
+    ]
+}
+
+# API failures worth reporting and carrying on from; anything else is a bug and should
+# surface (main() still keeps the menu alive)
+_TRANSIENT_API_ERRORS = (openai.RateLimitError, openai.APIConnectionError)
+
+# Menu choice -> persona name for the individual persona demos
+_CHOICE_TO_PERSONA: Dict[str, str] = {
+    '2': "Family Areas",
+    '3': "Young Professionals",
+    '4': "Luxury Central",
+    '5': "Up and Coming Areas",
+    '6': "First Time Buyer",
+    '7': "Unique London Properties",
+}
+
+
 class DemoRunner:
     """Runs demo scenarios for different buyer personas"""
 
     def __init__(self):
         self.collector = PropertyPreferenceCollector()
-        self.vector_store = None
-        self._setup_vector_store()
+        # Search results keyed by (query, k), reused when the same query is searched again
+        self._search_cache: Dict[Tuple[str, int], List[Dict]] = {}
+        self._personalizer: Optional[ListingPersonalizer] = None
+
+        # Warm the vector store up in the background while the user reads the menu
+        executor = ThreadPoolExecutor(max_workers=1)
+        self._vector_store_future: Future = executor.submit(self._setup_vector_store)
+        executor.shutdown(wait=False)
+
+    @property
+    def vector_store(self) -> Optional[PropertyVectorStore]:
+        """The vector store, or None if it failed to initialize; blocks until setup has finished"""
+        return self._vector_store_future.result()
+
+    @property
+    def personalizer(self) -> ListingPersonalizer:
+        """Shared personalizer, created on first use"""
+        if self._personalizer is None:
+            self._personalizer = ListingPersonalizer()
+        return self._personalizer
 
     def get_persona_responses(self) -> Dict[str, List[str]]:
         """Get all persona responses in one place"""
-        return {
-            "Family Areas": [
-                "terraced house",  # property type
-                "£900,000 to £1,200,000",  # budget
-                "3 bedrooms, but 4 would be great",  # bedrooms
-                "2 bathrooms, en-suite would be nice",  # bathrooms
-                "Yes, we need a garden for the kids",  # outdoor space
-                "Richmond or Wimbledon, somewhere family-friendly",  # areas
-                "Central London, about 45 minutes is acceptable",  # commute
-                "Rail or tube, need reliable transport",  # transport
-                "Good schools, parks, family pubs, safe area",  # amenities
-                "Established family neighborhoods",  # community
-                "Off-street parking, period features would be lovely",  # features
-                "Good schools, garden, transport links",  # priorities
-                "Yes, that's all correct"  # confirmation
-            ],
-            "Young Professionals": [
-                "modern flat",  # property type
-                "£450,000 to £550,000",  # budget
-                "1 bedroom, maybe 2 if budget allows",  # bedrooms
-                "1 bathroom is fine",  # bathrooms
-                "A balcony would be nice but not essential",  # outdoor space
-                "Clapham, Islington, or Shoreditch",  # areas
-                "Central London, ideally under 30 minutes",  # commute
-                "Tube access is essential, Northern or Central line preferred",  # transport
-                "Cafes, restaurants, nightlife, gyms nearby",  # amenities
-                "Trendy areas with good nightlife",  # community
-                "Modern kitchen, good internet, secure building",  # features
-                "Transport links, nightlife, modern amenities",  # priorities
-                "Yes, sounds perfect"  # confirmation
-            ],
-            "Luxury Central": [
-                "period apartment or penthouse",  # property type
-                "£2,500,000 to £3,500,000",  # budget
-                "3 bedrooms minimum",  # bedrooms
-                "2-3 bathrooms, master en-suite essential",  # bathrooms
-                "Private terrace or garden would be perfect",  # outdoor space
-                "Kensington, Chelsea, or Mayfair",  # areas
-                "Central London, but comfort is more important than time",  # commute
-                "Quality transport, but happy to use taxis",  # transport
-                "High-end restaurants, boutique shopping, cultural attractions",  # amenities
-                "Prestigious central locations",  # community
-                "Period features, high-end finishes, concierge service",  # features
-                "Location, luxury finishes, period character",  # priorities
-                "Yes, exactly what I'm looking for"  # confirmation
-            ],
-            "Up and Coming Areas": [
-                "Victorian conversion or terraced house",  # property type
-                "£400,000 to £650,000",  # budget
-                "2-3 bedrooms",  # bedrooms
-                "1-2 bathrooms",  # bathrooms
-                "Small garden or courtyard would be great",  # outdoor space
-                "Peckham, Forest Hill, or Walthamstow",  # areas
-                "Central London, up to 45 minutes is okay",  # commute
-                "Good transport links, Overground or tube",  # transport
-                "Local cafes, markets, developing arts scene",  # amenities
-                "Up-and-coming areas with potential",  # community
-                "Character features, potential for improvement",  # features
-                "Good transport, value for money, character",  # priorities
-                "Yes, that captures what I want"  # confirmation
-            ],
-            "First Time Buyer": [
-                "studio flat or 1-bed flat",  # property type
-                "£250,000 to £350,000",  # budget
-                "Studio or 1 bedroom",  # bedrooms
-                "1 bathroom is sufficient",  # bathrooms
-                "Not essential, but a small balcony would be nice",  # outdoor space
-                "Croydon, Woolwich, or outer London zones",  # areas
-                "Central London, willing to commute up to an hour",  # commute
-                "Regular transport links, doesn't have to be tube",  # transport
-                "Basic amenities, shops, maybe a gym nearby",  # amenities
-                "Friendly areas, good for first-time buyers",  # community
-                "Help to Buy eligible, modern amenities, secure",  # features
-                "Affordability, transport links, safe area",  # priorities
-                "Yes, perfect for getting on the ladder"  # confirmation
-            ],
-            "Unique London Properties": [
-                "warehouse conversion or loft apartment",  # property type
-                "£1,000,000 to £1,500,000",  # budget
-                "2-3 bedrooms",  # bedrooms
-                "2 bathrooms, modern fittings",  # bathrooms
-                "Unique outdoor space, roof terrace maybe",  # outdoor space
-                "King's Cross, Canary Wharf, or Bermondsey",  # areas
-                "Central London or Canary Wharf",  # commute
-                "Good connections, DLR or tube",  # transport
-                "Trendy restaurants, cultural attractions, galleries",  # amenities
-                "Creative areas with unique character",  # community
-                "Industrial character, high ceilings, unique features",  # features
-                "Unique character, location, architectural interest",  # priorities
-                "Yes, that's exactly the kind of unique property I want"  # confirmation
-            ]
-        }
-
-    def _setup_vector_store(self):
+        return _PERSONA_RESPONSES
+
+    def _setup_vector_store(self) -> Optional[PropertyVectorStore]:
         """Initialize the vector store for search demonstrations"""
         try:
-            self.vector_store = PropertyVectorStore()
-            success = self.vector_store.setup_vectorstore()
+            vector_store = PropertyVectorStore()
+            success = vector_store.setup_vectorstore()
             if not success:
                 print("⚠️  Warning: Vector store setup failed. Search results won't be available.")
+                return None
+            return vector_store
         except Exception as e:
             print(f"⚠️  Warning: Could not initialize vector store: {e}")
+            return None
 
     def run_persona_demo(self, persona_name: str, responses: List[str]) -> None:
         """Run a demo for a specific persona with predefined responses"""
-        print(f"\n{'='*60}")
-        print(f"🏠 DEMO: {persona_name.upper()} PERSONA")
-        print(f"{'='*60}")
-
         # Reset collector for new demo
         self.collector.reset()
 
+        if not self._replay_conversation(self.collector, persona_name, responses):
+            return
+
+        # Generate and display semantic query
+        semantic_query = self.collector.generate_semantic_query()
+        self._print_semantic_query(semantic_query)
+
+        # Perform search if vector store is available
+        if self.vector_store:
+            self._demonstrate_search(semantic_query)
+
+    def _replay_conversation(
+        self,
+        collector: PropertyPreferenceCollector,
+        persona_name: str,
+        responses: List[str]
+    ) -> bool:
+        """Replay a persona's responses through a collector; returns True once preferences are complete"""
+        # The scripted transcript needs no input, so buffer it and write it out in one go
+        buf = io.StringIO()
+        print(f"\n{'='*60}", file=buf)
+        print(f"🏠 DEMO: {persona_name.upper()} PERSONA", file=buf)
+        print(f"{'='*60}", file=buf)
+
         # Start with greeting
-        print("🤖 Assistant:", self.collector.get_greeting_message())
-        print()
+        print("🤖 Assistant:", collector.get_greeting_message(), file=buf)
+        print(file=buf)
 
         # Process each response
         for i, response in enumerate(responses):
-            print(f"👤 User: {response}\n")
-            assistant_response = self.collector.process_response(response)
-            print(f"🤖 Assistant: {assistant_response}\n")
+            print(f"👤 User: {response}\n", file=buf)
+            assistant_response = collector.process_response(response)
+            print(f"🤖 Assistant: {assistant_response}\n", file=buf)
 
-            if self.collector.is_complete():
+            if collector.is_complete():
                 break
 
-        # Generate and display semantic query
-        if self.collector.is_complete():
-            try:
-                semantic_query = self.collector.generate_semantic_query()
-                print(f"🔍 Generated Semantic Query:")
-                print(f"   {semantic_query}")
-                print()
+        complete = collector.is_complete()
+        if not complete:
+            print("❌ Demo incomplete - not all preferences collected", file=buf)
 
-                # Perform search if vector store is available
-                if self.vector_store:
-                    self._demonstrate_search(semantic_query)
+        sys.stdout.write(buf.getvalue())
+        sys.stdout.flush()
+        return complete
 
-            except Exception as e:
-                print(f"❌ Error generating query: {e}")
-        else:
-            print("❌ Demo incomplete - not all preferences collected")
+    def _print_semantic_query(self, semantic_query: str, file: TextIO = None) -> None:
+        print(f"🔍 Generated Semantic Query:", file=file)
+        print(f"   {semantic_query}", file=file)
+        print(file=file)
 
     def _demonstrate_search(self, query: str) -> None:
         """Demonstrate search results using the generated query"""
         try:
             print("🔍 Searching vector database...")
-            results = self.vector_store.semantic_search(query, k=1)
-            personalizer = ListingPersonalizer()
-            personalized_results = personalizer.personalize_listings(results, self.collector.preferences)
-
-            personalizer.display_personalized_results(personalized_results)
+            results = self._search_cache.get((query, 1))
+            if results is None:
+                results = self.vector_store.semantic_search(query, k=1)
+                self._search_cache[(query, 1)] = results
+            self._display_personalized(results, self.collector.preferences)
 
-        except Exception as e:
+        except _TRANSIENT_API_ERRORS as e:
             print(f"❌ Search error: {e}")
 
+    def _display_personalized(self, results: List[Dict], preferences: BuyerPreferences) -> None:
+        """Personalize search results for the buyer, printing descriptions as they stream in"""
+        self.personalizer.stream_personalized_results(results, preferences)
+
     def run_all_demos(self):
         """Run all persona demos"""
+        asyncio.run(self.arun_all_demos())
+
+    async def arun_all_demos(self):
+        """Run all persona demos, generating every persona's query concurrently"""
         persona_responses = self.get_persona_responses()
 
+        # Each persona gets its own collector so their query generations can overlap
+        collectors: Dict[str, PropertyPreferenceCollector] = {}
         for persona_name, responses in persona_responses.items():
-            self.run_persona_demo(persona_name, responses)
+            collector = PropertyPreferenceCollector()
+            if self._replay_conversation(collector, persona_name, responses):
+                collectors[persona_name] = collector
+
+        # Submit every query generation before awaiting any of them
+        semantic_queries = await asyncio.gather(
+            *[collector.agenerate_semantic_query() for collector in collectors.values()],
+            return_exceptions=True
+        )
+
+        persona_queries = []
+        buf = io.StringIO()
+        for (persona_name, collector), semantic_query in zip(collectors.items(), semantic_queries):
+            if isinstance(semantic_query, Exception):
+                if not isinstance(semantic_query, _TRANSIENT_API_ERRORS):
+                    raise semantic_query
+                print(f"❌ Error generating query for {persona_name}: {semantic_query}", file=buf)
+                continue
+
+            print(f"🏠 {persona_name}", file=buf)
+            self._print_semantic_query(semantic_query, file=buf)
+            persona_queries.append((persona_name, semantic_query, collector.preferences))
+        sys.stdout.write(buf.getvalue())
+        sys.stdout.flush()
+
+        if not self.vector_store or not persona_queries:
+            return
+
+        # Search for all personas with a single embedding call
+        try:
+            print("🔍 Searching vector database for all personas...")
+            uncached_queries = list(dict.fromkeys(
+                semantic_query for _, semantic_query, _ in persona_queries
+                if (semantic_query, 1) not in self._search_cache
+            ))
+            if uncached_queries:
+                batch_results = self.vector_store.semantic_search_batch(uncached_queries, k=1)
+                for semantic_query, results in zip(uncached_queries, batch_results):
+                    self._search_cache[(semantic_query, 1)] = results
+        except _TRANSIENT_API_ERRORS as e:
+            print(f"❌ Search error: {e}")
+            return
+
+        # Personalize every persona's results concurrently, then display them in order
+        personalizer = self.personalizer
+        all_personalized = await asyncio.gather(
+            *[
+                personalizer.apersonalize_listings(self._search_cache[(semantic_query, 1)], preferences)
+                for _, semantic_query, preferences in persona_queries
+            ],
+            return_exceptions=True
+        )
+
+        for (persona_name, _, _), personalized_results in zip(persona_queries, all_personalized):
+            print(f"\n{'='*60}")
+            print(f"🏠 RESULTS: {persona_name.upper()} PERSONA")
+            print(f"{'='*60}")
+            if isinstance(personalized_results, Exception):
+                if not isinstance(personalized_results, _TRANSIENT_API_ERRORS):
+                    raise personalized_results
+                print(f"❌ Search error: {personalized_results}")
+                continue
+            personalizer.display_personalized_results(personalized_results)
 
     def run_interactive_demo(self):
         """Run an interactive demo where user can input their own preferences"""
@@ -216,9 +349,6 @@ class DemoRunner:
             except KeyboardInterrupt:
                 print("\n👋 Thanks for trying the demo!")
                 return
-            except Exception as e:
-                print(f"❌ Error: {e}")
-                break
 
         # Generate query and search if complete
         if self.collector.is_complete():
@@ -231,7 +361,7 @@ class DemoRunner:
                     print(f"\n🔍 Searching for properties...")
                     self._demonstrate_search(semantic_query)
 
-            except Exception as e:
+            except _TRANSIENT_API_ERRORS as e:
                 print(f"❌ Error generating query: {e}")
 
 
@@ -259,28 +389,9 @@ def main():
 
             if choice == '1':
                 demo.run_all_demos()
-            elif choice in ['2', '3', '4', '5', '6', '7']:
-                # Get persona responses once for all individual demos
-                persona_responses = demo.get_persona_responses()
-
-                if choice == '2':
-                    # Family Areas
-                    demo.run_persona_demo("Family Areas", persona_responses["Family Areas"])
-                elif choice == '3':
-                    # Young Professionals
-                    demo.run_persona_demo("Young Professionals", persona_responses["Young Professionals"])
-                elif choice == '4':
-                    # Luxury Central
-                    demo.run_persona_demo("Luxury Central", persona_responses["Luxury Central"])
-                elif choice == '5':
-                    # Up and Coming
-                    demo.run_persona_demo("Up and Coming Areas", persona_responses["Up and Coming Areas"])
-                elif choice == '6':
-                    # First Time Buyer
-                    demo.run_persona_demo("First Time Buyer", persona_responses["First Time Buyer"])
-                elif choice == '7':
-                    # Unique Properties
-                    demo.run_persona_demo("Unique London Properties", persona_responses["Unique London Properties"])
+            elif choice in _CHOICE_TO_PERSONA:
+                persona_name = _CHOICE_TO_PERSONA[choice]
+                demo.run_persona_demo(persona_name, _PERSONA_RESPONSES[persona_name])
             elif choice == '8':
                 demo.run_interactive_demo()
             elif choice == '9':
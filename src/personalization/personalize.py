@@ -7,23 +7,154 @@ to generate personalized property listing descriptions that highlight aspects
 most relevant to the buyer while maintaining factual integrity.
 """
 
+import io
 import os
-from typing import List, Dict, Any, Optional
+import re
+import math
+import time
+import asyncio
+import hashlib
+from typing import List, Dict, Any, AsyncIterator, MutableMapping, Optional, Tuple
 from dataclasses import dataclass
 
+import numpy as np
+import orjson
 from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
 from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from langchain_openai import ChatOpenAI
+from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
+from openai import OpenAI
 
 # Import from our existing modules
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from search.search import BuyerPreferences
+from search.search import BuyerPreferences, get_llm
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Upper bound on concurrent personalization requests per personalize_listings call
+MAX_CONCURRENT_PERSONALIZATIONS = 5
+
+# Fixed keyword groups used to spot preference matches in a listing
+_BEDROOM_KEYWORDS = frozenset({"bedroom", "bed"})
+_OUTDOOR_KEYWORDS = frozenset({"garden", "balcony", "terrace", "outdoor", "patio"})
+_TRANSPORT_KEYWORDS = frozenset({"tube", "station", "transport", "bus", "rail", "line"})
+_HIGHLIGHT_KEYWORDS = _BEDROOM_KEYWORDS | _OUTDOOR_KEYWORDS | _TRANSPORT_KEYWORDS
+
+# Prompt used to rewrite a listing for a buyer, parsed once at import. Static
+# guidelines come first and the buyer/listing details last so the prefix is cacheable.
+_PERSONALIZATION_PROMPT = PromptTemplate.from_template(
+    """You are a skilled real estate agent writing a personalized property description for a specific buyer.
+
+PERSONALIZATION GUIDELINES:
+1. MAINTAIN ALL FACTUAL INFORMATION: Keep all prices, addresses, sizes, and factual details exactly as they are
+2. EMPHASIZE RELEVANT ASPECTS: Highlight features that match the buyer's stated preferences
+3. USE BUYER'S LANGUAGE: Reference their specific needs and priorities in the description
+4. CONNECT TO LIFESTYLE: Show how the property fits their lifestyle and requirements
+5. HIGHLIGHT MATCHES: Draw attention to elements that align with their top priorities
+6. MAINTAIN PROFESSIONAL TONE: Keep the description engaging but professional
+
+Using the buyer context below, write a personalized version of the original listing that speaks directly to this buyer's needs while maintaining all factual accuracy. Make them excited about how this property could be perfect for them.
+
+--- BUYER CONTEXT ---
+
+BUYER PREFERENCES:
+- Property Type: {property_type}
+- Budget: {budget_range}
+- Bedrooms: {bedrooms}
+- Bathrooms: {bathrooms}
+- Outdoor Space Needs: {outdoor_space}
+- Preferred Areas: {preferred_areas}
+- Commute Requirements: {commute_location}
+- Transport Preferences: {transport_preference}
+- Important Amenities: {amenities}
+- Community Type: {community_type}
+- Must-Have Features: {must_have_features}
+- Top Priorities: {top_priorities}
+
+PERSONALIZATION FOCUS:
+- Focus on the preferred areas and must-have features above
+- Property category: {category}
+
+ORIGINAL LISTING:
+{original_content}
+
+PERSONALIZED LISTING:"""
+)
+
+# Variant of the prompt above that rewrites several listings for the same buyer in
+# one request, so the shared instructions and buyer context are only sent once
+_FUSED_PERSONALIZATION_PROMPT = PromptTemplate.from_template(
+    """You are a skilled real estate agent writing personalized property descriptions for a specific buyer.
+
+PERSONALIZATION GUIDELINES:
+1. MAINTAIN ALL FACTUAL INFORMATION: Keep all prices, addresses, sizes, and factual details exactly as they are
+2. EMPHASIZE RELEVANT ASPECTS: Highlight features that match the buyer's stated preferences
+3. USE BUYER'S LANGUAGE: Reference their specific needs and priorities in the description
+4. CONNECT TO LIFESTYLE: Show how the property fits their lifestyle and requirements
+5. HIGHLIGHT MATCHES: Draw attention to elements that align with their top priorities
+6. MAINTAIN PROFESSIONAL TONE: Keep the description engaging but professional
+
+Using the buyer context below, write a personalized version of each original listing that speaks directly to this buyer's needs while maintaining all factual accuracy. Make them excited about how each property could be perfect for them. Rewrite every listing independently - never mix details between listings.
+
+RESPONSE FORMAT:
+Respond with a JSON object only, with one entry per listing using the listing's number as its id:
+{{"listings": [{{"id": 1, "text": "<personalized listing 1>"}}, {{"id": 2, "text": "<personalized listing 2>"}}]}}
+
+--- BUYER CONTEXT ---
+
+BUYER PREFERENCES:
+- Property Type: {property_type}
+- Budget: {budget_range}
+- Bedrooms: {bedrooms}
+- Bathrooms: {bathrooms}
+- Outdoor Space Needs: {outdoor_space}
+- Preferred Areas: {preferred_areas}
+- Commute Requirements: {commute_location}
+- Transport Preferences: {transport_preference}
+- Important Amenities: {amenities}
+- Community Type: {community_type}
+- Must-Have Features: {must_have_features}
+- Top Priorities: {top_priorities}
+
+PERSONALIZATION FOCUS:
+- Focus on the preferred areas and must-have features above
+
+ORIGINAL LISTINGS ({listing_count}):
+{listings}"""
+)
+
+# Most listings rewritten in a single fused prompt, keeping the response within output limits
+MAX_LISTINGS_PER_PROMPT = 5
+
+# Rules used when printing personalized listings
+_HEADER_RULE = "=" * 60
+_SECTION_RULE = "-" * 60
+
+# Listings shorter than this are shown as-is rather than sent to the LLM
+MIN_PERSONALIZATION_LENGTH = 200
+
+# Longest buyer answer passed to the personalization prompt
+PREFERENCE_FIELD_MAX_CHARS = 200
+
+# Listings longer than this are condensed to their most relevant sentences before prompting
+CONDENSE_MAX_CHARS = 2000
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"[a-z0-9£]+")
+# Header line that ends a listing's title and Basic Info block
+_DESCRIPTION_HEADER = re.compile(r"^[#*\s]*Property Description\b", re.IGNORECASE | re.MULTILINE)
+# Section header lines such as "**Area Description:**" or "## Transport"
+_HEADING = re.compile(r"^\s*(#+\s.*|\*\*[^*]+\*\*:?)\s*$")
+
+# Personalized descriptions are cached on disk keyed by listing and buyer preferences
+PERSONALIZATION_CACHE_DIR = "data/.personalization_cache"
+
+# Near-duplicate listings (cosine similarity above the threshold) reuse a cached description
+SEMANTIC_CACHE_THRESHOLD = 0.97
+SEMANTIC_CACHE_SIZE = 1024
+
 
 @dataclass
 class PersonalizedListing:
@@ -36,15 +167,192 @@ class PersonalizedListing:
     metadata: Dict[str, Any]
 
 
+def _clip(text: str, max_chars: int = PREFERENCE_FIELD_MAX_CHARS) -> str:
+    """Shorten text to at most max_chars, cutting at a word boundary"""
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0] + "…"
+
+
+def _split_basic_info(content: str) -> Tuple[str, str]:
+    """Split a listing into its title and Basic Info block and everything after it
+
+    The split is made at the "Property Description" header. Listings without one are
+    split at the first blank line instead.
+    """
+    match = _DESCRIPTION_HEADER.search(content)
+    if match:
+        return content[:match.start()].strip(), content[match.start():]
+    head, _, body = content.strip().partition("\n\n")
+    return head, body
+
+
+def _condense_listing(content: str, preference_text: str, max_chars: int = CONDENSE_MAX_CHARS) -> str:
+    """Cut a long listing down to the sentences most relevant to the buyer
+
+    Everything before the Property Description header (title and basic info: price,
+    address, size) is kept verbatim, as are section headers. The remaining sentences are
+    scored by IDF-weighted overlap with the buyer's preference words and the best ones
+    are kept, in their original order and lines, until max_chars is reached.
+    """
+    if len(content) <= max_chars:
+        return content
+
+    head, body = _split_basic_info(content)
+    lines = body.strip().split("\n")
+    headings = {i for i, line in enumerate(lines) if _HEADING.match(line)}
+
+    # (line index, sentence) for every sentence outside the headers
+    units = [
+        (line_index, sentence)
+        for line_index, line in enumerate(lines) if line_index not in headings
+        for sentence in _SENTENCE_SPLIT.split(line.strip()) if sentence
+    ]
+    sentences = [sentence for _, sentence in units]
+    if not sentences:
+        return content
+
+    # Inverse document frequency over the listing's own sentences, so words that
+    # appear everywhere (e.g. "london") carry little weight
+    sentence_words = [set(_WORD.findall(sentence.lower())) for sentence in sentences]
+    document_frequency: Dict[str, int] = {}
+    for words in sentence_words:
+        for word in words:
+            document_frequency[word] = document_frequency.get(word, 0) + 1
+
+    preference_words = set(_WORD.findall(preference_text.lower()))
+    scores = [
+        sum(math.log(len(sentences) / document_frequency[word]) + 1.0 for word in words & preference_words)
+        for words in sentence_words
+    ]
+
+    budget = max_chars - len(head) - sum(len(lines[i]) + 1 for i in headings)
+    keep = set()
+    for i in sorted(range(len(sentences)), key=lambda i: scores[i], reverse=True):
+        if len(sentences[i]) + 1 > budget:
+            continue
+        keep.add(i)
+        budget -= len(sentences[i]) + 1
+
+    # Rebuild the body line by line so headers, bullets and paragraph breaks survive
+    kept_by_line: Dict[int, List[str]] = {}
+    for i in sorted(keep):
+        kept_by_line.setdefault(units[i][0], []).append(sentences[i])
+
+    condensed = io.StringIO()
+    condensed.write(head)
+    condensed.write("\n\n")
+    for line_index, line in enumerate(lines):
+        if line_index in headings:
+            condensed.write(line.strip() + "\n")
+        elif line_index in kept_by_line:
+            condensed.write(" ".join(kept_by_line[line_index]) + "\n")
+        elif not line.strip():
+            condensed.write("\n")
+
+    return re.sub(r"\n{3,}", "\n\n", condensed.getvalue()).strip()
+
+
+class _SemanticCache:
+    """Bounded in-memory cache looked up by embedding similarity rather than exact key
+
+    Entries are grouped by a key string so that only entries in the same group
+    (e.g. the same buyer) can match. The least recently used entry is evicted
+    once max_entries is reached.
+    """
+
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD, max_entries: int = SEMANTIC_CACHE_SIZE):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._vectors: Optional[np.ndarray] = None  # (max_entries, dim), unit length rows
+        self._groups: List[str] = []
+        self._values: List[str] = []
+        self._last_used: List[int] = []
+        self._clock = 0
+
+    def get(self, group: str, embedding: List[float]) -> Optional[str]:
+        """Return the value of the most similar entry in the group, or None below the threshold"""
+        if not self._values:
+            return None
+
+        similarities = self._vectors[:len(self._values)] @ self._normalize(embedding)
+        for i, entry_group in enumerate(self._groups):
+            if entry_group != group:
+                similarities[i] = -1.0
+
+        best = int(similarities.argmax())
+        if similarities[best] < self.threshold:
+            return None
+
+        self._clock += 1
+        self._last_used[best] = self._clock
+        return self._values[best]
+
+    def set(self, group: str, embedding: List[float], value: str) -> None:
+        """Store a value, evicting the least recently used entry when full"""
+        vector = self._normalize(embedding)
+        if self._vectors is None:
+            self._vectors = np.empty((self.max_entries, vector.shape[0]), dtype=np.float32)
+
+        self._clock += 1
+        if len(self._values) < self.max_entries:
+            slot = len(self._values)
+            self._groups.append(group)
+            self._values.append(value)
+            self._last_used.append(self._clock)
+        else:
+            slot = int(np.argmin(self._last_used))
+            self._groups[slot] = group
+            self._values[slot] = value
+            self._last_used[slot] = self._clock
+
+        self._vectors[slot] = vector
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
 class ListingPersonalizer:
     """Generates personalized listing descriptions based on buyer preferences"""
 
-    def __init__(self):
-        self.llm = ChatOpenAI(
-            model="gpt-4o-mini",
-            temperature=0.7,  # Slightly higher for creative personalization
-            api_key=os.getenv("OPENAI_API_KEY"),
-            base_url=os.getenv("OPENAI_BASE_URL")
+    def __init__(
+        self,
+        cache: Optional[MutableMapping[str, str]] = None,
+        min_content_length: int = MIN_PERSONALIZATION_LENGTH,
+        min_highlights: int = 1,
+        embeddings: Optional[Embeddings] = None,
+        semantic_cache_threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        listings_per_prompt: int = MAX_LISTINGS_PER_PROMPT
+    ):
+        """
+        Args:
+            cache: Mapping used to memoize descriptions, e.g. a plain dict. When
+                omitted, descriptions are cached as files in PERSONALIZATION_CACHE_DIR.
+            min_content_length: Listings shorter than this are not personalized
+            min_highlights: Listings matching fewer buyer preferences than this are not personalized
+            embeddings: Embedding model used to reuse descriptions of near-duplicate
+                listings for the same buyer, e.g. PropertyVectorStore.embeddings. Only
+                listings with identical Basic Info blocks share a description. The
+                semantic cache is disabled when omitted.
+            semantic_cache_threshold: Cosine similarity above which two listings count as duplicates
+            listings_per_prompt: How many listings personalize_listings rewrites per LLM
+                request; 1 sends every listing in its own request
+        """
+        self.llm = get_llm(0.7)  # Slightly higher temperature for creative personalization
+        self.cache = cache
+        self.min_content_length = min_content_length
+        self.min_highlights = min_highlights
+        self.embeddings = embeddings
+        self._semantic_cache = _SemanticCache(threshold=semantic_cache_threshold)
+        self.listings_per_prompt = listings_per_prompt
+        self._chain = _PERSONALIZATION_PROMPT | self.llm | StrOutputParser()
+        self._fused_chain = (
+            _FUSED_PERSONALIZATION_PROMPT
+            | self.llm.bind(response_format={"type": "json_object"})
+            | JsonOutputParser()
         )
 
     def personalize_listings(
@@ -62,202 +370,552 @@ class ListingPersonalizer:
         Returns:
             List of PersonalizedListing objects with tailored descriptions
         """
-        personalized_listings = []
+        return asyncio.run(self.apersonalize_listings(search_results, buyer_preferences))
 
-        # Extract key preference themes for personalization
-        preference_context = self._extract_preference_context(buyer_preferences)
+    async def apersonalize_listings(
+        self,
+        search_results: List[Dict[str, Any]],
+        buyer_preferences: BuyerPreferences
+    ) -> List[PersonalizedListing]:
+        """
+        Async variant of personalize_listings that personalizes all results concurrently
 
-        for result in search_results:
-            try:
-                personalized_description = self._generate_personalized_description(
+        Args:
+            search_results: Results from vector store semantic search
+            buyer_preferences: Collected buyer preferences
+
+        Returns:
+            List of PersonalizedListing objects, in the same order as search_results
+        """
+        # Prompt inputs shared by every listing for this buyer
+        base_inputs = self._preference_inputs(buyer_preferences)
+        highlights = self._identify_highlights_for_listings(
+            [result['content'] for result in search_results],
+            buyer_preferences
+        )
+
+        # Created per call so the semaphore belongs to the running event loop
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_PERSONALIZATIONS)
+
+        # Rewrite uncached listings several per request first; the per-listing pass
+        # below then picks those descriptions up from the cache
+        if self.listings_per_prompt > 1:
+            await self._aprefill_fused_descriptions(search_results, highlights, base_inputs, semaphore)
+
+        async def bounded(result: Dict[str, Any], listing_highlights: List[str]) -> PersonalizedListing:
+            async with semaphore:
+                return await self._apersonalize_one(result, listing_highlights, base_inputs)
+
+        return list(await asyncio.gather(*[
+            bounded(result, listing_highlights)
+            for result, listing_highlights in zip(search_results, highlights)
+        ]))
+
+    async def _apersonalize_one(
+        self,
+        result: Dict[str, Any],
+        highlights: List[str],
+        base_inputs: Dict[str, str]
+    ) -> PersonalizedListing:
+        """Personalize a single search result, falling back to the original text on failure"""
+        try:
+            if self._should_personalize(result['content'], highlights):
+                personalized_description = await self._agenerate_personalized_description(
                     original_content=result['content'],
-                    preferences=buyer_preferences,
-                    preference_context=preference_context,
+                    base_inputs=base_inputs,
                     category=result['metadata'].get('category', 'Unknown')
                 )
+            else:
+                print("Skipping personalization - listing is too short or matches no preferences")
+                personalized_description = result['content']
+
+            return PersonalizedListing(
+                original_content=result['content'],
+                personalized_description=personalized_description,
+                category=result['metadata'].get('category', 'Unknown'),
+                similarity_score=result['similarity_score'],
+                preference_highlights=highlights,
+                metadata=result['metadata']
+            )
+
+        except Exception as e:
+            print(f"Warning: Could not personalize listing - {e}")
+            # Fallback to original content if personalization fails
+            return PersonalizedListing(
+                original_content=result['content'],
+                personalized_description=result['content'],
+                category=result['metadata'].get('category', 'Unknown'),
+                similarity_score=result['similarity_score'],
+                preference_highlights=[],
+                metadata=result['metadata']
+            )
+
+    async def _aprefill_fused_descriptions(
+        self,
+        search_results: List[Dict[str, Any]],
+        highlights: List[List[str]],
+        base_inputs: Dict[str, str],
+        semaphore: asyncio.Semaphore
+    ) -> None:
+        """Personalize uncached listings in groups of listings_per_prompt, storing results in the cache
+
+        A group that fails or returns malformed output is left uncached, so its
+        listings fall back to one request each.
+        """
+        pending = []
+        for result, listing_highlights in zip(search_results, highlights):
+            if not self._should_personalize(result['content'], listing_highlights):
+                continue
+            inputs = self._personalization_inputs(
+                base_inputs,
+                result['content'],
+                result['metadata'].get('category', 'Unknown')
+            )
+            cache_key = self._cache_key(inputs)
+            if self._cache_get(cache_key) is None:
+                pending.append((cache_key, inputs))
+
+        groups = [
+            pending[start:start + self.listings_per_prompt]
+            for start in range(0, len(pending), self.listings_per_prompt)
+        ]
+
+        async def run(group: List[Tuple[str, Dict[str, str]]]) -> None:
+            async with semaphore:
+                try:
+                    descriptions = await self._agenerate_fused_descriptions(
+                        [inputs for _, inputs in group],
+                        base_inputs
+                    )
+                except Exception as e:
+                    print(f"Warning: Could not personalize {len(group)} listings in one request - {e}")
+                    return
+
+            for (cache_key, _), description in zip(group, descriptions):
+                self._cache_set(cache_key, description)
+
+        # A lone listing gains nothing from fusing and uses the regular prompt
+        await asyncio.gather(*[run(group) for group in groups if len(group) > 1])
+
+    async def _agenerate_fused_descriptions(
+        self,
+        listing_inputs: List[Dict[str, str]],
+        base_inputs: Dict[str, str]
+    ) -> List[str]:
+        """Rewrite several listings for the same buyer with a single LLM request"""
+        listings = "\n\n".join(
+            f"### LISTING {number} (category: {inputs['category']})\n{inputs['original_content']}"
+            for number, inputs in enumerate(listing_inputs, 1)
+        )
+        response = await self._fused_chain.ainvoke({
+            **base_inputs,
+            "listing_count": len(listing_inputs),
+            "listings": listings
+        })
 
-                # Extract highlighted preference matches
-                highlights = self._identify_preference_highlights(
-                    result['content'],
-                    buyer_preferences
-                )
+        texts = {int(item["id"]): item["text"] for item in response["listings"]}
+        missing = [number for number in range(1, len(listing_inputs) + 1) if not texts.get(number)]
+        if missing:
+            raise ValueError(f"response is missing listings {missing}")
 
-                personalized_listing = PersonalizedListing(
-                    original_content=result['content'],
-                    personalized_description=personalized_description,
-                    category=result['metadata'].get('category', 'Unknown'),
-                    similarity_score=result['similarity_score'],
-                    preference_highlights=highlights,
-                    metadata=result['metadata']
-                )
+        return [texts[number].strip() for number in range(1, len(listing_inputs) + 1)]
 
-                personalized_listings.append(personalized_listing)
+    def personalize_listings_batch(
+        self,
+        search_results: List[Dict[str, Any]],
+        buyer_preferences: BuyerPreferences,
+        poll_interval: float = 30.0
+    ) -> List[PersonalizedListing]:
+        """
+        Personalize search results through the OpenAI Batch API
 
-            except Exception as e:
-                print(f"Warning: Could not personalize listing - {e}")
-                # Fallback to original content if personalization fails
-                fallback_listing = PersonalizedListing(
-                    original_content=result['content'],
-                    personalized_description=result['content'],
-                    category=result['metadata'].get('category', 'Unknown'),
-                    similarity_score=result['similarity_score'],
-                    preference_highlights=[],
-                    metadata=result['metadata']
-                )
-                personalized_listings.append(fallback_listing)
+        Half the price of real-time calls but can take up to the 24h completion
+        window, so only suitable for offline/bulk jobs such as saved searches.
 
-        return personalized_listings
+        Args:
+            search_results: Results from vector store semantic search
+            buyer_preferences: Collected buyer preferences
+            poll_interval: Seconds to wait between batch status checks
 
-    def _extract_preference_context(self, preferences: BuyerPreferences) -> Dict[str, str]:
-        """Extract and categorize key preference themes for personalization"""
-        context = {
-            "property_focus": preferences.property_type,
-            "budget_context": preferences.budget_range,
-            "location_priorities": preferences.preferred_areas,
-            "amenity_priorities": preferences.amenities,
-            "transport_priorities": preferences.transport_preference,
-            "feature_priorities": preferences.must_have_features,
-            "top_priorities": preferences.top_priorities
-        }
+        Returns:
+            List of PersonalizedListing objects, in the same order as search_results
+        """
+        if not search_results:
+            return []
 
-        return context
+        client = OpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=os.getenv("OPENAI_BASE_URL")
+        )
 
-    def _generate_personalized_description(
+        base_inputs = self._preference_inputs(buyer_preferences)
+        highlights = self._identify_highlights_for_listings(
+            [result['content'] for result in search_results],
+            buyer_preferences
+        )
+
+        requests = []
+        for i, result in enumerate(search_results):
+            if not self._should_personalize(result['content'], highlights[i]):
+                continue
+
+            prompt = _PERSONALIZATION_PROMPT.format(**self._personalization_inputs(
+                base_inputs,
+                result['content'],
+                result['metadata'].get('category', 'Unknown')
+            ))
+            requests.append({
+                "custom_id": f"listing-{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.llm.model_name,
+                    "temperature": self.llm.temperature,
+                    "messages": [{"role": "user", "content": prompt}]
+                }
+            })
+
+        descriptions = self._run_personalization_batch(client, requests, poll_interval) if requests else {}
+
+        personalized_listings = []
+        for i, result in enumerate(search_results):
+            listing_highlights = highlights[i]
+            if not self._should_personalize(result['content'], listing_highlights):
+                description = result['content']
+            else:
+                description = descriptions.get(f"listing-{i}")
+                if description is None:
+                    # Fallback to original content if this request failed
+                    print(f"Warning: Could not personalize listing {i} - using original description")
+                    listing_highlights = []
+                    description = result['content']
+
+            personalized_listings.append(PersonalizedListing(
+                original_content=result['content'],
+                personalized_description=description,
+                category=result['metadata'].get('category', 'Unknown'),
+                similarity_score=result['similarity_score'],
+                preference_highlights=listing_highlights,
+                metadata=result['metadata']
+            ))
+
+        return personalized_listings
+
+    def _run_personalization_batch(
         self,
-        original_content: str,
-        preferences: BuyerPreferences,
-        preference_context: Dict[str, str],
-        category: str
-    ) -> str:
-        """Generate a personalized description using LLM"""
+        client: OpenAI,
+        requests: List[Dict[str, Any]],
+        poll_interval: float
+    ) -> Dict[str, str]:
+        """Submit batch requests, wait for completion and return descriptions by custom_id"""
+        payload = b"\n".join(orjson.dumps(request) for request in requests)
+        batch_file = client.files.create(file=("personalization_batch.jsonl", payload), purpose="batch")
+        batch = client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        print(f"Submitted personalization batch {batch.id} with {len(requests)} listings")
+
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            time.sleep(poll_interval)
+            batch = client.batches.retrieve(batch.id)
+
+        descriptions: Dict[str, str] = {}
+        if batch.status == "completed" and batch.output_file_id:
+            for line in client.files.content(batch.output_file_id).text.splitlines():
+                item = orjson.loads(line)
+                if item.get("error") or item["response"]["status_code"] != 200:
+                    continue
+                content = item["response"]["body"]["choices"][0]["message"]["content"]
+                descriptions[item["custom_id"]] = content.strip()
+        else:
+            print(f"Warning: Personalization batch {batch.id} finished with status '{batch.status}'")
 
-        personalization_prompt = PromptTemplate.from_template(
-            """You are a skilled real estate agent writing a personalized property description for a specific buyer.
+        return descriptions
 
-ORIGINAL LISTING:
-{original_content}
+    async def astream_personalize(
+        self,
+        search_results: List[Dict[str, Any]],
+        buyer_preferences: BuyerPreferences,
+        highlights: Optional[List[List[str]]] = None
+    ) -> AsyncIterator[Tuple[int, str]]:
+        """
+        Stream personalized descriptions as they are generated
 
-BUYER PREFERENCES:
-- Property Type: {property_type}
-- Budget: {budget_range}
-- Bedrooms: {bedrooms}
-- Bathrooms: {bathrooms}
-- Outdoor Space Needs: {outdoor_space}
-- Preferred Areas: {preferred_areas}
-- Commute Requirements: {commute_location}
-- Transport Preferences: {transport_preference}
-- Important Amenities: {amenities}
-- Community Type: {community_type}
-- Must-Have Features: {must_have_features}
-- Top Priorities: {top_priorities}
+        Listings are personalized one after another, so chunks for different
+        listings never interleave. A listing whose personalization fails before
+        any text arrives falls back to its original content.
 
-PERSONALIZATION GUIDELINES:
-1. MAINTAIN ALL FACTUAL INFORMATION: Keep all prices, addresses, sizes, and factual details exactly as they are
-2. EMPHASIZE RELEVANT ASPECTS: Highlight features that match the buyer's stated preferences
-3. USE BUYER'S LANGUAGE: Reference their specific needs and priorities in the description
-4. CONNECT TO LIFESTYLE: Show how the property fits their lifestyle and requirements
-5. HIGHLIGHT MATCHES: Draw attention to elements that align with their top priorities
-6. MAINTAIN PROFESSIONAL TONE: Keep the description engaging but professional
+        Args:
+            highlights: Preference highlights per listing, if the caller already has them
 
- PERSONALIZATION FOCUS:
- - Property category: {category}
- - Location priorities: {location_priorities}
- - Feature priorities: {feature_priorities}
+        Yields:
+            (index into search_results, text chunk) tuples
+        """
+        base_inputs = self._preference_inputs(buyer_preferences)
+        if highlights is None:
+            highlights = self._identify_highlights_for_listings(
+                [result['content'] for result in search_results],
+                buyer_preferences
+            )
+
+        for index, result in enumerate(search_results):
+            if not self._should_personalize(result['content'], highlights[index]):
+                # Not worth an LLM call - pass the original text through as one chunk
+                yield index, result['content']
+                continue
+
+            streamed = False
+            try:
+                async for chunk in self._astream_personalized_description(
+                    original_content=result['content'],
+                    base_inputs=base_inputs,
+                    category=result['metadata'].get('category', 'Unknown')
+                ):
+                    streamed = True
+                    yield index, chunk
+            except Exception as e:
+                print(f"Warning: Could not personalize listing - {e}")
+                # Text already streamed can't be taken back; otherwise show the original
+                if not streamed:
+                    yield index, result['content']
 
- Write a personalized version of the listing that speaks directly to this buyer's needs while maintaining all factual accuracy. Make them excited about how this property could be perfect for them.
+    def stream_personalized_results(
+        self,
+        search_results: List[Dict[str, Any]],
+        buyer_preferences: BuyerPreferences
+    ) -> List[PersonalizedListing]:
+        """Personalize and display search results, printing each description as it streams in"""
+        return asyncio.run(self.astream_personalized_results(search_results, buyer_preferences))
 
-PERSONALIZED LISTING:"""
+    async def astream_personalized_results(
+        self,
+        search_results: List[Dict[str, Any]],
+        buyer_preferences: BuyerPreferences
+    ) -> List[PersonalizedListing]:
+        """Async variant of stream_personalized_results"""
+        print(f"\n🎯 PERSONALIZED PROPERTY RECOMMENDATIONS")
+        print(f"Found {len(search_results)} properties tailored to your preferences\n")
+
+        highlights = self._identify_highlights_for_listings(
+            [result['content'] for result in search_results],
+            buyer_preferences
         )
+        descriptions: List[List[str]] = [[] for _ in search_results]
+
+        current_index = None
+        async for index, chunk in self.astream_personalize(search_results, buyer_preferences, highlights):
+            if index != current_index:
+                if current_index is not None:
+                    print("\n\n" + _SECTION_RULE + "\n")
+                print(f"RECOMMENDATION #{index + 1}")
+                print(self._format_listing_header(search_results[index]['similarity_score'], highlights[index]))
+                current_index = index
+
+            print(chunk, end="", flush=True)
+            descriptions[index].append(chunk)
+        print("\n")
+
+        return [
+            PersonalizedListing(
+                original_content=result['content'],
+                personalized_description="".join(chunks).strip(),
+                category=result['metadata'].get('category', 'Unknown'),
+                similarity_score=result['similarity_score'],
+                preference_highlights=listing_highlights,
+                metadata=result['metadata']
+            )
+            for result, chunks, listing_highlights in zip(search_results, descriptions, highlights)
+        ]
+
+    def _should_personalize(self, original_content: str, highlights: List[str]) -> bool:
+        """Whether a listing is long enough and relevant enough to be worth an LLM call"""
+        return len(original_content) >= self.min_content_length and len(highlights) >= self.min_highlights
+
+    async def _agenerate_personalized_description(
+        self,
+        original_content: str,
+        base_inputs: Dict[str, str],
+        category: str
+    ) -> str:
+        """Generate a personalized description using LLM"""
+        chunks = []
+        async for chunk in self._astream_personalized_description(original_content, base_inputs, category):
+            chunks.append(chunk)
 
-        # Generate the personalized description
-        chain = personalization_prompt | self.llm | StrOutputParser()
-
-        personalized_content = chain.invoke({
-            "original_content": original_content,
-            "property_type": preferences.property_type,
-            "budget_range": preferences.budget_range,
-            "bedrooms": preferences.bedrooms,
-            "bathrooms": preferences.bathrooms,
-            "outdoor_space": preferences.outdoor_space,
-            "preferred_areas": preferences.preferred_areas,
-            "commute_location": preferences.commute_location,
-            "transport_preference": preferences.transport_preference,
-            "amenities": preferences.amenities,
-            "community_type": preferences.community_type,
-            "must_have_features": preferences.must_have_features,
-            "top_priorities": preferences.top_priorities,
-            "category": category,
-            "location_priorities": preference_context.get("location_priorities", ""),
-            "feature_priorities": preference_context.get("feature_priorities", "")
-        })
+        return "".join(chunks).strip()
 
-        return personalized_content.strip()
+    async def _astream_personalized_description(
+        self,
+        original_content: str,
+        base_inputs: Dict[str, str],
+        category: str
+    ) -> AsyncIterator[str]:
+        """Stream a personalized description from the LLM chunk by chunk"""
+        inputs = self._personalization_inputs(base_inputs, original_content, category)
+
+        # A cached description is replayed as a single chunk
+        cache_key = self._cache_key(inputs)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+        # Fall back to a description of a near-duplicate listing with otherwise identical inputs.
+        # Its basic info (title, address, price, size) must match exactly, so the reused text
+        # never states another listing's facts. The hit is still not promoted to the exact cache.
+        listing_embedding = None
+        if self.embeddings is not None:
+            basic_info, _ = _split_basic_info(original_content)
+            semantic_group = self._cache_key({**inputs, "original_content": basic_info})
+            # Embedded as a document so CacheBackedEmbeddings reuses the vector from ingest
+            listing_embedding = (await self.embeddings.aembed_documents([original_content]))[0]
+            cached = self._semantic_cache.get(semantic_group, listing_embedding)
+            if cached is not None:
+                yield cached
+                return
+
+        chunks = []
+        async for chunk in self._chain.astream(inputs):
+            chunks.append(chunk)
+            yield chunk
+
+        description = "".join(chunks)
+        self._cache_set(cache_key, description)
+        if listing_embedding is not None:
+            self._semantic_cache.set(semantic_group, listing_embedding, description)
+
+    def _cache_key(self, inputs: Dict[str, str]) -> str:
+        """Hash the prompt inputs and model settings into a cache key"""
+        # Model settings are part of the key so changing them invalidates old entries
+        payload = orjson.dumps(
+            [self.llm.model_name, self.llm.temperature, inputs],
+            option=orjson.OPT_SORT_KEYS
+        )
+        return hashlib.blake2b(payload, digest_size=32).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        """Look up a cached description, returning None on a miss"""
+        if self.cache is not None:
+            return self.cache.get(key)
+
+        cache_path = os.path.join(PERSONALIZATION_CACHE_DIR, f"{key}.txt")
+        if not os.path.exists(cache_path):
+            return None
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def _cache_set(self, key: str, description: str) -> None:
+        """Store a generated description"""
+        if self.cache is not None:
+            self.cache[key] = description
+            return
+
+        os.makedirs(PERSONALIZATION_CACHE_DIR, exist_ok=True)
+        with open(os.path.join(PERSONALIZATION_CACHE_DIR, f"{key}.txt"), "w", encoding="utf-8") as f:
+            f.write(description)
+
+    def _preference_inputs(self, preferences: BuyerPreferences) -> Dict[str, str]:
+        """Template variables that depend only on the buyer, built once per search"""
+        # Free-text answers are clipped so a long reply can't blow up the prompt
+        return {
+            "property_type": _clip(preferences.property_type),
+            "budget_range": _clip(preferences.budget_range),
+            "bedrooms": _clip(preferences.bedrooms),
+            "bathrooms": _clip(preferences.bathrooms),
+            "outdoor_space": _clip(preferences.outdoor_space),
+            "preferred_areas": _clip(preferences.preferred_areas),
+            "commute_location": _clip(preferences.commute_location),
+            "transport_preference": _clip(preferences.transport_preference),
+            "amenities": _clip(preferences.amenities),
+            "community_type": _clip(preferences.community_type),
+            "must_have_features": _clip(preferences.must_have_features),
+            "top_priorities": _clip(preferences.top_priorities)
+        }
 
-    def _identify_preference_highlights(
+    def _personalization_inputs(
         self,
+        base_inputs: Dict[str, str],
         original_content: str,
-        preferences: BuyerPreferences
-    ) -> List[str]:
-        """Identify which buyer preferences are highlighted in the listing"""
-        highlights = []
-        content_lower = original_content.lower()
+        category: str
+    ) -> Dict[str, str]:
+        """Template variables for the personalization prompt"""
+        preference_text = " ".join(base_inputs.values())
+        return {
+            **base_inputs,
+            "original_content": _condense_listing(original_content, preference_text),
+            "category": category
+        }
 
-        # Check for property type matches
-        if preferences.property_type and preferences.property_type.lower() in content_lower:
-            highlights.append(f"Property Type: {preferences.property_type}")
+    def _identify_highlights_for_listings(
+        self,
+        contents: List[str],
+        preferences: BuyerPreferences
+    ) -> List[List[str]]:
+        """Identify highlighted preferences for several listings against the same buyer
 
-        # Check for bedroom/bathroom mentions
+        The buyer's keyword groups are worked out once and then reused for every listing.
+        """
+        lowered = preferences.lowered
+        area_words = [word for word in lowered.preferred_areas.split() if len(word) > 3]
+        amenity_words = [word for word in lowered.amenities.split() if len(word) > 3]
+
+        # (keywords, label) for each single-label check, skipping preferences the buyer left blank
+        checks = []
+        if lowered.property_type:
+            checks.append(((lowered.property_type,), f"Property Type: {preferences.property_type}"))
         if preferences.bedrooms:
-            bedroom_keywords = ["bedroom", "bed"]
-            if any(keyword in content_lower for keyword in bedroom_keywords):
-                highlights.append(f"Bedroom Requirements: {preferences.bedrooms}")
-
-        # Check for outdoor space mentions
-        if preferences.outdoor_space and preferences.outdoor_space.lower() != "no":
-            outdoor_keywords = ["garden", "balcony", "terrace", "outdoor", "patio"]
-            if any(keyword in content_lower for keyword in outdoor_keywords):
-                highlights.append("Outdoor Space Available")
-
-        # Check for area mentions
-        if preferences.preferred_areas:
-            area_words = preferences.preferred_areas.lower().split()
-            if any(word in content_lower for word in area_words if len(word) > 3):
-                highlights.append(f"Preferred Location: {preferences.preferred_areas}")
-
-        # Check for transport mentions
+            checks.append((_BEDROOM_KEYWORDS, f"Bedroom Requirements: {preferences.bedrooms}"))
+        if preferences.outdoor_space and lowered.outdoor_space != "no":
+            checks.append((_OUTDOOR_KEYWORDS, "Outdoor Space Available"))
+        if area_words:
+            checks.append((area_words, f"Preferred Location: {preferences.preferred_areas}"))
         if preferences.transport_preference:
-            transport_keywords = ["tube", "station", "transport", "bus", "rail", "line"]
-            if any(keyword in content_lower for keyword in transport_keywords):
-                highlights.append("Good Transport Links")
-
-        # Check for amenity mentions
-        if preferences.amenities:
-            amenity_words = preferences.amenities.lower().split()
-            matched_amenities = [word for word in amenity_words if word in content_lower and len(word) > 3]
+            checks.append((_TRANSPORT_KEYWORDS, "Good Transport Links"))
+
+        keywords = {keyword for group, _ in checks for keyword in group} | set(amenity_words)
+
+        all_highlights = []
+        for content in contents:
+            # Scan the listing once for every distinct keyword, then check each preference
+            # against the set of matches
+            content_lower = content.lower()
+            found = {keyword for keyword in keywords if keyword in content_lower}
+
+            highlights = [label for group, label in checks if not found.isdisjoint(group)]
+
+            matched_amenities = [word for word in amenity_words if word in found]
             if matched_amenities:
                 highlights.append(f"Desired Amenities: {', '.join(matched_amenities[:3])}")
 
-        return highlights
+            all_highlights.append(highlights)
+
+        return all_highlights
 
     def format_personalized_listing(self, listing: PersonalizedListing) -> str:
         """Format a personalized listing for display"""
-        output = []
-        output.append("=" * 60)
-        output.append(f"🏠 PERSONALIZED LISTING")
-        output.append(f"📊 Match Score: {listing.similarity_score:.4f}")
-        output.append("=" * 60)
+        header = self._format_listing_header(listing.similarity_score, listing.preference_highlights)
+        return f"{header}\n{listing.personalized_description}\n"
+
+    def _format_listing_header(self, similarity_score: float, preference_highlights: List[str]) -> str:
+        """Format the score and highlights shown above a personalized description"""
+        output = io.StringIO()
+        output.write(_HEADER_RULE)
+        output.write("\n🏠 PERSONALIZED LISTING\n")
+        output.write(f"📊 Match Score: {similarity_score:.4f}\n")
+        output.write(_HEADER_RULE)
+        output.write("\n")
 
-        if listing.preference_highlights:
-            output.append("✨ WHY THIS MATCHES YOUR PREFERENCES:")
-            for highlight in listing.preference_highlights:
-                output.append(f"   • {highlight}")
-            output.append("")
+        if preference_highlights:
+            output.write("✨ WHY THIS MATCHES YOUR PREFERENCES:\n")
+            for highlight in preference_highlights:
+                output.write(f"   • {highlight}\n")
+            output.write("\n")
 
-        output.append("📝 PERSONALIZED DESCRIPTION:")
-        output.append(listing.personalized_description)
-        output.append("")
+        output.write("📝 PERSONALIZED DESCRIPTION:")
 
-        return "\n".join(output)
+        return output.getvalue()
 
     def display_personalized_results(self, personalized_listings: List[PersonalizedListing]) -> None:
         """Display all personalized listings in a formatted way"""
@@ -268,13 +926,14 @@ PERSONALIZED LISTING:"""
             print(f"RECOMMENDATION #{i}")
             print(self.format_personalized_listing(listing))
             if i < len(personalized_listings):
-                print("\n" + "-" * 60 + "\n")
+                print("\n" + _SECTION_RULE + "\n")
 
 
 # Convenience function for easy integration
 def personalize_search_results(
     search_results: List[Dict[str, Any]],
-    buyer_preferences: BuyerPreferences
+    buyer_preferences: BuyerPreferences,
+    mode: str = "realtime"
 ) -> List[PersonalizedListing]:
     """
     Convenience function to personalize search results
@@ -282,11 +941,17 @@ def personalize_search_results(
     Args:
         search_results: Results from vector store semantic search
         buyer_preferences: Collected buyer preferences
+        mode: "realtime" for immediate results, or "batch" to go through the
+            cheaper but slower OpenAI Batch API
 
     Returns:
         List of PersonalizedListing objects
     """
     personalizer = ListingPersonalizer()
+    if mode == "batch":
+        return personalizer.personalize_listings_batch(search_results, buyer_preferences)
+    if mode != "realtime":
+        raise ValueError(f"Unknown personalization mode: {mode}")
     return personalizer.personalize_listings(search_results, buyer_preferences)
 
 
@@ -320,15 +985,12 @@ def demo_personalization():
         store = PropertyVectorStore()
         store.setup_vectorstore()
 
-        # Perform search
+        # Search and personalize in one pass
         query = "Modern 1-2 bedroom flat in trendy area with tube access, nightlife, and modern amenities"
-        search_results = store.semantic_search(query, k=1)
-
-        if search_results:
-            # Personalize results
-            personalizer = ListingPersonalizer()
-            personalized = personalizer.personalize_listings(search_results, preferences)
+        personalizer = ListingPersonalizer()
+        personalized = store.search_and_personalize(query, preferences, personalizer, k=1)
 
+        if personalized:
             # Display results
             personalizer.display_personalized_results(personalized)
         else:
@@ -1,6 +1,9 @@
+import io
 import os
-from typing import Dict, Any, Optional
-from dataclasses import dataclass, field
+from collections import namedtuple
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple
+from dataclasses import dataclass, field, fields, replace
 from enum import Enum
 
 from dotenv import load_dotenv
@@ -17,6 +20,52 @@ from vector_store.store import PropertyVectorStore
 load_dotenv()
 
 
+@lru_cache(maxsize=None)
+def get_llm(temperature: float) -> ChatOpenAI:
+    """Shared gpt-4o-mini client for the given temperature
+
+    Reusing one client per temperature keeps its HTTP connection pool warm across
+    collectors and personalizers instead of opening new connections each time.
+    """
+    return ChatOpenAI(
+        model="gpt-4o-mini",
+        temperature=temperature,
+        api_key=os.getenv("OPENAI_API_KEY"),
+        base_url=os.getenv("OPENAI_BASE_URL")
+    )
+
+
+# Prompt template for query generation, parsed once at import. Static instructions
+# come first and the buyer's answers last so the shared prefix is cacheable.
+_QUERY_TEMPLATE = PromptTemplate.from_template(
+    """Based on the home buyer preferences listed at the end, generate a natural language search query
+    that would effectively match against London property listings. The query should be detailed
+    and include the most important aspects of what the buyer is looking for.
+
+    Generate a natural language search query that captures the essence of what this buyer is looking for.
+    The query should be optimized for semantic search against property listings.
+
+    Example format: "Modern 2-bedroom flat in Clapham or Islington with good tube links, suitable for young professional, with nearby cafes and nightlife, under £600k"
+
+    Buyer Preferences:
+    - Property type: {property_type}
+    - Budget: {budget_range}
+    - Bedrooms: {bedrooms}
+    - Bathrooms: {bathrooms}
+    - Outdoor space: {outdoor_space}
+    - Preferred areas: {preferred_areas}
+    - Commute requirements: {commute_location}
+    - Transport preferences: {transport_preference}
+    - Desired amenities: {amenities}
+    - Community type: {community_type}
+    - Must-have features: {must_have_features}
+    - Top priorities: {top_priorities}
+    - Additional info: {additional_info}
+
+    Query:"""
+)
+
+
 class ConversationState(Enum):
     """Enum for tracking conversation state"""
     GREETING = "greeting"
@@ -36,9 +85,12 @@ class ConversationState(Enum):
     COMPLETE = "complete"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BuyerPreferences:
-    """Data class to store collected buyer preferences"""
+    """Data class to store collected buyer preferences
+
+    Instances are immutable and hashable; use dataclasses.replace to update a field.
+    """
     property_type: str = ""
     budget_range: str = ""
     bedrooms: str = ""
@@ -56,18 +108,76 @@ class BuyerPreferences:
     special_requirements: str = ""
     top_priorities: str = ""
     additional_info: str = ""
+    # Lowercased copy of every field above, computed once for keyword matching
+    lowered: "LoweredPreferences" = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # slots=True rules out cached_property, so fill the derived field eagerly
+        object.__setattr__(self, "lowered", LoweredPreferences(
+            *(getattr(self, name).lower() for name in LoweredPreferences._fields)
+        ))
+
+
+LoweredPreferences = namedtuple(
+    "LoweredPreferences",
+    [f.name for f in fields(BuyerPreferences) if f.init]
+)
 
 
 class PropertyPreferenceCollector:
     """Conversational agent for collecting home buyer preferences"""
 
+    # Current state -> (preference field to store the answer in, next state, next question)
+    _STATE_TABLE: Dict[ConversationState, Tuple[str, ConversationState, str]] = {
+        ConversationState.GREETING: (
+            "property_type", ConversationState.BUDGET,
+            "Great! What's your budget range?"
+        ),
+        ConversationState.BUDGET: (
+            "budget_range", ConversationState.BEDROOMS,
+            "How many bedrooms do you need? Any flexibility on this?"
+        ),
+        ConversationState.BEDROOMS: (
+            "bedrooms", ConversationState.BATHROOMS,
+            "Any preference on bathrooms? Is an en-suite important?"
+        ),
+        ConversationState.BATHROOMS: (
+            "bathrooms", ConversationState.OUTDOOR_SPACE,
+            "Do you need outdoor space? Garden, balcony, or roof terrace?"
+        ),
+        ConversationState.OUTDOOR_SPACE: (
+            "outdoor_space", ConversationState.AREAS,
+            "Are there specific areas in London you're interested in or want to avoid?"
+        ),
+        ConversationState.AREAS: (
+            "preferred_areas", ConversationState.COMMUTE,
+            "Where do you need to commute to for work? And what's your acceptable commute time?"
+        ),
+        ConversationState.COMMUTE: (
+            "commute_location", ConversationState.TRANSPORT,
+            "Do you prefer tube, bus, rail, or are you flexible with transport? How important are direct transport links?"
+        ),
+        ConversationState.TRANSPORT: (
+            "transport_preference", ConversationState.AMENITIES,
+            "What's important to have nearby: shops, restaurants, parks, gyms, schools? Do you prefer busy areas with nightlife or quieter residential areas?"
+        ),
+        ConversationState.AMENITIES: (
+            "amenities", ConversationState.COMMUNITY,
+            "Do you prefer established family neighborhoods, trendy up-and-coming areas, or central locations?"
+        ),
+        ConversationState.COMMUNITY: (
+            "community_type", ConversationState.FEATURES,
+            "Any must-have features (parking, period features, modern kitchen, etc.) or deal-breakers? Any special requirements?"
+        ),
+        ConversationState.FEATURES: (
+            "must_have_features", ConversationState.PRIORITIES,
+            "If you had to choose, what are your top 3 most important factors from everything we've discussed?"
+        ),
+    }
+
     def __init__(self):
-        self.llm = ChatOpenAI(
-            model="gpt-4o-mini",
-            temperature=0.3,
-            api_key=os.getenv("OPENAI_API_KEY"),
-            base_url=os.getenv("OPENAI_BASE_URL")
-        )
+        self.llm = get_llm(0.3)
+        self._query_chain = _QUERY_TEMPLATE | self.llm | StrOutputParser()
         self.preferences = BuyerPreferences()
         self.state = ConversationState.GREETING
         self.conversation_history = []
@@ -88,74 +198,13 @@ Options include: terraced house, semi-detached house, detached house, flat, stud
         # Store the response in conversation history
         self.conversation_history.append(f"User: {user_input}")
 
-        if self.state == ConversationState.GREETING:
-            self.preferences.property_type = user_input
-            self.state = ConversationState.BUDGET
-            response = "Great! What's your budget range?"
-
-        elif self.state == ConversationState.BUDGET:
-            self.preferences.budget_range = user_input
-            self.state = ConversationState.BEDROOMS
-            response = "How many bedrooms do you need? Any flexibility on this?"
-
-        elif self.state == ConversationState.BEDROOMS:
-            self.preferences.bedrooms = user_input
-            self.state = ConversationState.BATHROOMS
-            response = "Any preference on bathrooms? Is an en-suite important?"
-
-        elif self.state == ConversationState.BATHROOMS:
-            self.preferences.bathrooms = user_input
-            self.state = ConversationState.OUTDOOR_SPACE
-            response = "Do you need outdoor space? Garden, balcony, or roof terrace?"
-
-        elif self.state == ConversationState.OUTDOOR_SPACE:
-            self.preferences.outdoor_space = user_input
-            self.state = ConversationState.AREAS
-            response = "Are there specific areas in London you're interested in or want to avoid?"
-
-        elif self.state == ConversationState.AREAS:
-            self.preferences.preferred_areas = user_input
-            self.state = ConversationState.COMMUTE
-            response = "Where do you need to commute to for work? And what's your acceptable commute time?"
-
-        elif self.state == ConversationState.COMMUTE:
-            self.preferences.commute_location = user_input
-            self.state = ConversationState.TRANSPORT
-            response = "Do you prefer tube, bus, rail, or are you flexible with transport? How important are direct transport links?"
-
-        elif self.state == ConversationState.TRANSPORT:
-            self.preferences.transport_preference = user_input
-            self.state = ConversationState.AMENITIES
-            response = "What's important to have nearby: shops, restaurants, parks, gyms, schools? Do you prefer busy areas with nightlife or quieter residential areas?"
-
-        elif self.state == ConversationState.AMENITIES:
-            self.preferences.amenities = user_input
-            self.state = ConversationState.COMMUNITY
-            response = "Do you prefer established family neighborhoods, trendy up-and-coming areas, or central locations?"
-
-        elif self.state == ConversationState.COMMUNITY:
-            self.preferences.community_type = user_input
-            self.state = ConversationState.FEATURES
-            response = "Any must-have features (parking, period features, modern kitchen, etc.) or deal-breakers? Any special requirements?"
-
-        elif self.state == ConversationState.FEATURES:
-            self.preferences.must_have_features = user_input
-            self.state = ConversationState.PRIORITIES
-            response = "If you had to choose, what are your top 3 most important factors from everything we've discussed?"
-
-        elif self.state == ConversationState.PRIORITIES:
-            self.preferences.top_priorities = user_input
-            self.state = ConversationState.CONFIRMATION
-            response = self._generate_summary()
-
-        elif self.state == ConversationState.CONFIRMATION:
-            if "yes" in user_input.lower() or "correct" in user_input.lower():
-                self.state = ConversationState.COMPLETE
-                response = "Perfect! I'll now generate your property search query."
-            else:
-                self.preferences.additional_info = user_input
-                response = "Thanks for the clarification. I'll now generate your property search query."
-                self.state = ConversationState.COMPLETE
+        if self.state in self._STATE_TABLE:
+            attribute, next_state, response = self._STATE_TABLE[self.state]
+            self.preferences = replace(self.preferences, **{attribute: user_input})
+            self.state = next_state
+
+        elif self.state in self._HANDLERS:
+            response = self._HANDLERS[self.state](self, user_input)
 
         else:
             response = "I'm not sure how to respond to that. Could you try again?"
@@ -165,77 +214,73 @@ Options include: terraced house, semi-detached house, detached house, flat, stud
 
         return response
 
+    def _handle_priorities(self, user_input: str) -> str:
+        """Record the top priorities and ask the buyer to confirm the summary"""
+        self.preferences = replace(self.preferences, top_priorities=user_input)
+        self.state = ConversationState.CONFIRMATION
+        return self._generate_summary()
+
+    def _handle_confirmation(self, user_input: str) -> str:
+        """Finish the conversation, keeping any clarification as additional info"""
+        self.state = ConversationState.COMPLETE
+        if "yes" in user_input.lower() or "correct" in user_input.lower():
+            return "Perfect! I'll now generate your property search query."
+
+        self.preferences = replace(self.preferences, additional_info=user_input)
+        return "Thanks for the clarification. I'll now generate your property search query."
+
+    # (label, preference field) pairs listed in the confirmation summary, in order
+    _SUMMARY_FIELDS = (
+        ("Property type", "property_type"),
+        ("Budget", "budget_range"),
+        ("Bedrooms", "bedrooms"),
+        ("Bathrooms", "bathrooms"),
+        ("Outdoor space", "outdoor_space"),
+        ("Preferred areas", "preferred_areas"),
+        ("Commute", "commute_location"),
+        ("Transport", "transport_preference"),
+        ("Amenities", "amenities"),
+        ("Community type", "community_type"),
+        ("Features", "must_have_features"),
+        ("Top priorities", "top_priorities"),
+    )
+
+    # States needing more than storing the answer, mapped to their handlers
+    _HANDLERS = {
+        ConversationState.PRIORITIES: _handle_priorities,
+        ConversationState.CONFIRMATION: _handle_confirmation,
+    }
+
     def _generate_summary(self) -> str:
         """Generate a summary of collected preferences for confirmation"""
-        summary = "Let me confirm what I've understood about your preferences:\n\n"
-
-        if self.preferences.property_type:
-            summary += f"• Property type: {self.preferences.property_type}\n"
-        if self.preferences.budget_range:
-            summary += f"• Budget: {self.preferences.budget_range}\n"
-        if self.preferences.bedrooms:
-            summary += f"• Bedrooms: {self.preferences.bedrooms}\n"
-        if self.preferences.bathrooms:
-            summary += f"• Bathrooms: {self.preferences.bathrooms}\n"
-        if self.preferences.outdoor_space:
-            summary += f"• Outdoor space: {self.preferences.outdoor_space}\n"
-        if self.preferences.preferred_areas:
-            summary += f"• Preferred areas: {self.preferences.preferred_areas}\n"
-        if self.preferences.commute_location:
-            summary += f"• Commute: {self.preferences.commute_location}\n"
-        if self.preferences.transport_preference:
-            summary += f"• Transport: {self.preferences.transport_preference}\n"
-        if self.preferences.amenities:
-            summary += f"• Amenities: {self.preferences.amenities}\n"
-        if self.preferences.community_type:
-            summary += f"• Community type: {self.preferences.community_type}\n"
-        if self.preferences.must_have_features:
-            summary += f"• Features: {self.preferences.must_have_features}\n"
-        if self.preferences.top_priorities:
-            summary += f"• Top priorities: {self.preferences.top_priorities}\n"
-
-        summary += "\nIs this correct? If there's anything else important I should know about your ideal property, please let me know."
-
-        return summary
+        summary = io.StringIO()
+        summary.write("Let me confirm what I've understood about your preferences:\n\n")
+
+        for label, attribute in self._SUMMARY_FIELDS:
+            value = getattr(self.preferences, attribute)
+            if value:
+                summary.write(f"• {label}: {value}\n")
+
+        summary.write("\nIs this correct? If there's anything else important I should know about your ideal property, please let me know.")
+
+        return summary.getvalue()
 
     def generate_semantic_query(self) -> str:
         """Generate semantic search query from collected preferences"""
+        query = self._query_chain.invoke(self._semantic_query_inputs())
+        return query.strip()
+
+    async def agenerate_semantic_query(self) -> str:
+        """Async variant of generate_semantic_query, for generating several queries concurrently"""
+        query = await self._query_chain.ainvoke(self._semantic_query_inputs())
+        return query.strip()
+
+    def _semantic_query_inputs(self) -> Dict[str, str]:
+        """Collect the template variables for query generation"""
         if self.state != ConversationState.COMPLETE:
             raise ValueError("Cannot generate query - preference collection not complete")
 
-        # Create prompt template for query generation
-        query_template = PromptTemplate.from_template(
-            """Based on the following home buyer preferences, generate a natural language search query
-            that would effectively match against London property listings. The query should be detailed
-            and include the most important aspects of what the buyer is looking for.
-
-            Buyer Preferences:
-            - Property type: {property_type}
-            - Budget: {budget_range}
-            - Bedrooms: {bedrooms}
-            - Bathrooms: {bathrooms}
-            - Outdoor space: {outdoor_space}
-            - Preferred areas: {preferred_areas}
-            - Commute requirements: {commute_location}
-            - Transport preferences: {transport_preference}
-            - Desired amenities: {amenities}
-            - Community type: {community_type}
-            - Must-have features: {must_have_features}
-            - Top priorities: {top_priorities}
-            - Additional info: {additional_info}
-
-            Generate a natural language search query that captures the essence of what this buyer is looking for.
-            The query should be optimized for semantic search against property listings.
-
-            Example format: "Modern 2-bedroom flat in Clapham or Islington with good tube links, suitable for young professional, with nearby cafes and nightlife, under £600k"
-
-            Query:"""
-        )
-
-        # Generate the query
-        chain = query_template | self.llm | StrOutputParser()
-
-        query = chain.invoke({
+        return {
             "property_type": self.preferences.property_type,
             "budget_range": self.preferences.budget_range,
             "bedrooms": self.preferences.bedrooms,
@@ -249,9 +294,7 @@ Options include: terraced house, semi-detached house, detached house, flat, stud
             "must_have_features": self.preferences.must_have_features,
             "top_priorities": self.preferences.top_priorities,
             "additional_info": self.preferences.additional_info
-        })
-
-        return query.strip()
+        }
 
     def is_complete(self) -> bool:
         """Check if preference collection is complete"""
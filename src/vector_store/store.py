@@ -4,17 +4,30 @@ London Property Vector Store Module
 
 This module handles embedding generation and vector storage for London property listings.
 It uses ChromaDB as the vector database and OpenAI embeddings for semantic search capabilities.
+For large corpora a FAISS HNSW index can be used instead (requires the optional faiss-cpu
+and langchain-community packages). When pyarrow is installed the listings are converted
+to Parquet once and read from there on later runs.
 """
 
 import os
-import json
-import uuid
-from typing import List, Dict, Any, Optional
+import sys
+import mmap
+import logging
+import sqlite3
+import itertools
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from typing import List, Dict, Any, Iterable, Iterator, Literal, Optional, Tuple
 from dataclasses import dataclass
+from pathlib import Path
 
 import chromadb
+import numpy as np
+import orjson
 from chromadb.config import Settings
 from dotenv import load_dotenv
+from langchain.embeddings import CacheBackedEmbeddings
+from langchain.storage import LocalFileStore
 from langchain_openai import OpenAIEmbeddings
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
@@ -22,9 +35,70 @@ from langchain_core.documents import Document
 # Load environment variables from .env file
 load_dotenv()
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+LISTINGS_JSON = "data/listings.json"
+# "source" metadata value shared by every generated listing
+LISTING_SOURCE = "generated_listings"
+# Columnar copy of LISTINGS_JSON, which is much faster to load than re-parsing the JSON
+LISTINGS_PARQUET = "data/listings.parquet"
+
+# Document embeddings are cached on disk keyed by a hash of their text, so rebuilding
+# the index only calls OpenAI for listings that have changed
+EMBEDDING_CACHE_DIR = "data/.embedding_cache"
+
+# Documents embedded and written to the collection per request when building the index
+EMBEDDING_BATCH_SIZE = 500
+# Embedding requests in flight at once when building the index
+EMBEDDING_WORKERS = 8
+
+# Recent query strings whose embeddings are kept in memory
+QUERY_EMBEDDING_CACHE_SIZE = 1024
+
+# Where each backend persists its index by default
+DEFAULT_PERSIST_DIRECTORIES = {
+    "chroma": "data/chroma_db",
+    "faiss": "data/faiss_index",
+}
+
+# Neighbours per node in the FAISS HNSW graph
+FAISS_HNSW_M = 32
+
+# HNSW candidate list size for Chroma searches. Chroma copies its hnsw:* settings into
+# the index when the collection is created, so this can't be changed per search.
+CHROMA_SEARCH_EF = 100
+
+
+def _import_faiss():
+    """Import the optional FAISS backend dependencies"""
+    try:
+        import faiss
+        from langchain_community.docstore.in_memory import InMemoryDocstore
+        from langchain_community.vectorstores import FAISS
+    except ImportError as e:
+        raise ImportError(
+            "The faiss backend requires the faiss-cpu and langchain-community packages"
+        ) from e
+    return faiss, InMemoryDocstore, FAISS
+
+
+def _import_pyarrow():
+    """Import the optional Parquet dependencies"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Reading and writing Parquet listings requires the pyarrow package") from e
+    return pa, pq
+
+
+@dataclass(frozen=True, slots=True)
 class PropertyListing:
-    """Structure for a property listing with metadata"""
+    """Structure for a property listing with metadata
+
+    Slotted and immutable, so large corpora carry no per-instance __dict__ and
+    listings can be hashed.
+    """
     id: str
     category: str
     content: str
@@ -33,126 +107,519 @@ class PropertyListing:
 class PropertyVectorStore:
     """Manages the vector database for London property listings"""
 
-    def __init__(self, persist_directory: str = "data/chroma_db"):
-        """Initialize the vector store"""
-        self.persist_directory = persist_directory
-        self.embeddings = OpenAIEmbeddings(
-            api_key=os.getenv("OPENAI_API_KEY"),
-            base_url=os.getenv("OPENAI_BASE_URL")
-        )
+    # Persist directories already created by this process
+    _ensured_dirs: set = set()
+
+    def __init__(
+        self,
+        persist_directory: Optional[str] = None,
+        backend: Literal["chroma", "faiss"] = "chroma",
+        fp16_vectors: bool = True
+    ):
+        """Initialize the vector store
+
+        Args:
+            persist_directory: Where the index is stored; defaults to a per-backend directory under data/
+            backend: "chroma" (default) or "faiss" for an HNSW index better suited to large corpora
+            fp16_vectors: Store FAISS vectors as float16, halving index memory for a negligible
+                loss in recall. Chroma always stores float32 vectors.
+        """
+        if backend not in DEFAULT_PERSIST_DIRECTORIES:
+            raise ValueError(f"Unknown vector store backend: {backend}")
+        self.backend = backend
+        self.fp16_vectors = fp16_vectors
+        self.persist_directory = persist_directory or DEFAULT_PERSIST_DIRECTORIES[backend]
+        self._embeddings: Optional[CacheBackedEmbeddings] = None
         self.vectorstore = None
+        self._search_ef: Optional[int] = None
+        # Documents in the loaded index; counting a Chroma collection scans its SQLite table
+        self._doc_count: Optional[int] = None
+        # Recently embedded query strings, least recently used first
+        self._query_embeddings: "OrderedDict[str, Tuple[float, ...]]" = OrderedDict()
         self._ensure_directory()
 
+    @property
+    def embeddings(self) -> CacheBackedEmbeddings:
+        """Disk-cached OpenAI embeddings, created on first use
+
+        Loading an existing index and reading its stats never embed anything, so
+        those paths don't construct an OpenAI client.
+        """
+        if self._embeddings is None:
+            underlying_embeddings = OpenAIEmbeddings(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                base_url=os.getenv("OPENAI_BASE_URL")
+            )
+            self._embeddings = CacheBackedEmbeddings.from_bytes_store(
+                underlying_embeddings,
+                LocalFileStore(EMBEDDING_CACHE_DIR),
+                namespace=underlying_embeddings.model,
+                key_encoder="sha256"
+            )
+        return self._embeddings
+
     def _ensure_directory(self):
-        """Ensure the persist directory exists"""
-        os.makedirs(self.persist_directory, exist_ok=True)
+        """Ensure the persist directory exists, touching the filesystem once per path per process"""
+        if self.persist_directory in self._ensured_dirs:
+            return
+        Path(self.persist_directory).mkdir(parents=True, exist_ok=True)
+        self._ensured_dirs.add(self.persist_directory)
+
+    def _open_chroma(self, embedding_function: Optional[CacheBackedEmbeddings] = None) -> Chroma:
+        """Open the Chroma collection, creating it with our HNSW settings if it doesn't exist
+
+        Every code path that can create the collection must go through here: Chroma copies
+        the hnsw:* metadata into the index only when the collection is first created.
+        """
+        return Chroma(
+            persist_directory=self.persist_directory,
+            embedding_function=embedding_function,
+            collection_name="london_properties",
+            collection_metadata={"hnsw:search_ef": CHROMA_SEARCH_EF}
+        )
 
-    def load_listings_from_json(self, json_file: str = "data/listings.json") -> List[PropertyListing]:
-        """Load property listings from JSON file and convert to PropertyListing objects"""
-        try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                raw_data = json.load(f)
+    def _enable_sqlite_wal(self) -> None:
+        """Switch Chroma's SQLite database to write-ahead logging
 
-            listings = []
-            for category, category_listings in raw_data.items():
-                for i, listing_text in enumerate(category_listings):
-                    # Generate unique ID for each listing
-                    listing_id = f"{category}_{i}_{str(uuid.uuid4())[:8]}"
+        In the default rollback-journal mode every committed write is fsynced; with WAL
+        writes are appended to the log and synced at checkpoints instead. The journal
+        mode is stored in the database file, so this only has to succeed once.
+        """
+        db_path = Path(self.persist_directory) / "chroma.sqlite3"
+        if not db_path.exists():
+            return
+        try:
+            conn = sqlite3.connect(db_path)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning("Could not enable WAL mode on %s: %s", db_path, e)
+
+    def load_listings_from_json(self, json_file: str = LISTINGS_JSON) -> List[PropertyListing]:
+        """Load property listings from JSON file and convert to PropertyListing objects"""
+        return [
+            PropertyListing(id=doc.metadata["id"], category=doc.metadata["category"], content=doc.page_content)
+            for doc in self.iter_documents(json_file)
+        ]
 
-                    listing = PropertyListing(
-                        id=listing_id,
-                        category=category,
-                        content=listing_text,
-                    )
-                    listings.append(listing)
+    def iter_documents(self, json_file: str = LISTINGS_JSON) -> Iterator[Document]:
+        """Yield a LangChain Document with metadata for each listing in the JSON file
 
-            print(f"Loaded {len(listings)} property listings from {json_file}")
-            return listings
+        Documents are built straight from the parsed JSON in a single pass. Nothing
+        is yielded if the file is missing or invalid.
+        """
+        try:
+            # Parse straight from a read-only mapping of the file instead of copying it into memory first
+            with open(json_file, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                    raw_data = orjson.loads(view)
 
         except FileNotFoundError:
-            print(f"Error: {json_file} not found. Please generate listings first.")
-            return []
-        except json.JSONDecodeError:
-            print(f"Error: Invalid JSON in {json_file}")
-            return []
+            logger.error("%s not found. Please generate listings first.", json_file)
+            return
+        except ValueError:
+            # orjson.JSONDecodeError, or mmap refusing an empty file
+            logger.error("Invalid JSON in %s", json_file)
+            return
+
+        logger.info(
+            "Loaded %d property listings from %s",
+            sum(len(category_listings) for category_listings in raw_data.values()), json_file
+        )
 
-    def create_documents(self, listings: List[PropertyListing]) -> List[Document]:
-        """Convert PropertyListing objects to LangChain Documents with metadata"""
-        documents = []
+        for category, category_listings in raw_data.items():
+            # Interned so every load shares one string object per category
+            category = sys.intern(category)
+            for i, listing_text in enumerate(category_listings):
+                # (category, position) is already unique, and stable across rebuilds
+                listing_id = f"{category}_{i}"
+
+                # Create document with full listing content and metadata for filtering and search
+                yield Document(
+                    page_content=listing_text,
+                    metadata={
+                        "id": listing_id,
+                        "category": category,
+                        "source": LISTING_SOURCE
+                    }
+                )
+
+    def load_listings_from_parquet(self, parquet_file: str = LISTINGS_PARQUET) -> List[PropertyListing]:
+        """Load property listings from a Parquet file written by _convert_json_to_parquet"""
+        return [
+            PropertyListing(id=doc.metadata["id"], category=doc.metadata["category"], content=doc.page_content)
+            for doc in self.iter_parquet_documents(parquet_file)
+        ]
+
+    def iter_parquet_documents(self, parquet_file: str = LISTINGS_PARQUET) -> Iterator[Document]:
+        """Yield a LangChain Document with metadata for each listing in the Parquet file"""
+        _, pq = _import_pyarrow()
+        table = pq.read_table(parquet_file, columns=["id", "category", "content"], memory_map=True)
+
+        logger.info("Loaded %d property listings from %s", table.num_rows, parquet_file)
+
+        # Convert a record batch at a time rather than the whole table
+        for record_batch in table.to_batches():
+            for row in record_batch.to_pylist():
+                yield Document(
+                    page_content=row["content"],
+                    metadata={
+                        "id": row["id"],
+                        # pyarrow creates a new string per row; keep one copy per category
+                        "category": sys.intern(row["category"]),
+                        "source": LISTING_SOURCE
+                    }
+                )
+
+    def _convert_json_to_parquet(
+        self,
+        json_file: str = LISTINGS_JSON,
+        parquet_file: str = LISTINGS_PARQUET
+    ) -> bool:
+        """Write the listings in json_file to parquet_file, returning False if there were none"""
+        pa, pq = _import_pyarrow()
+
+        columns: Dict[str, List[str]] = {"id": [], "category": [], "content": []}
+        for doc in self.iter_documents(json_file):
+            columns["id"].append(doc.metadata["id"])
+            columns["category"].append(doc.metadata["category"])
+            columns["content"].append(doc.page_content)
+
+        if not columns["id"]:
+            return False
 
-        for listing in listings:
-            # Create metadata for filtering and search
-            metadata = {
-                "id": listing.id,
-                "category": listing.category,
-                "source": "generated_listings"
-            }
+        # Write beside the target and swap it in, so a crash never leaves a truncated file
+        temp_file = f"{parquet_file}.tmp"
+        pq.write_table(pa.table(columns), temp_file)
+        os.replace(temp_file, parquet_file)
 
-            # Create document with full listing content
-            doc = Document(
-                page_content=listing.content,
-                metadata=metadata
-            )
-            documents.append(doc)
+        logger.info("Converted %s to %s", json_file, parquet_file)
+        return True
 
-        return documents
+    def _iter_listing_documents(self) -> Iterator[Document]:
+        """Documents to build the index from, read from Parquet when pyarrow is available
 
-    def initialize_vectorstore(self, documents: List[Document]) -> None:
-        """Initialize ChromaDB vector store with documents"""
-        print("Creating embeddings and initializing vector store...")
+        The Parquet copy is rewritten whenever it is missing or older than the JSON file.
+        Without pyarrow the JSON file is read directly.
+        """
+        try:
+            _import_pyarrow()
+        except ImportError:
+            return self.iter_documents()
 
-        # Create ChromaDB vector store
-        self.vectorstore = Chroma.from_documents(
-            documents=documents,
-            embedding=self.embeddings,
-            persist_directory=self.persist_directory,
-            collection_name="london_properties"
+        parquet_is_current = os.path.exists(LISTINGS_PARQUET) and (
+            not os.path.exists(LISTINGS_JSON)
+            or os.path.getmtime(LISTINGS_PARQUET) >= os.path.getmtime(LISTINGS_JSON)
         )
+        if not parquet_is_current and not self._convert_json_to_parquet():
+            return iter(())
+
+        return self.iter_parquet_documents()
+
+    def initialize_vectorstore(
+        self,
+        documents: Iterable[Document],
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        max_workers: int = EMBEDDING_WORKERS
+    ) -> None:
+        """Initialize the vector store with documents, embedding batches concurrently
+
+        documents may be a lazy iterator; only a few batches are held in memory at once.
+        """
+        logger.info("Creating embeddings and initializing vector store...")
+        self._search_ef = None
+        self._doc_count = None
+
+        if self.backend == "chroma":
+            # Create ChromaDB vector store
+            self.vectorstore = self._open_chroma(embedding_function=self.embeddings)
+            self._enable_sqlite_wal()
+        else:
+            # The FAISS index is created with the first batch, once the embedding size is known
+            self.vectorstore = None
 
-        print(f"Vector store initialized with {len(documents)} property listings")
-        print(f"Persisted to: {self.persist_directory}")
+        # One embedding request and one collection write per batch rather than per document.
+        # Embedding requests are network bound, so several batches are embedded at once and
+        # each is written as soon as its embeddings arrive.
+        documents = iter(documents)
+        total_documents = 0
 
-    def load_existing_vectorstore(self) -> bool:
-        """Load existing vector store if it exists"""
+        # Workers only embed; every write happens here on the calling thread
+        def write(future: Future) -> None:
+            batch = futures.pop(future)
+            self._write_batch(batch, future.result())
+
+        futures: Dict[Future, List[Document]] = {}
         try:
-            self.vectorstore = Chroma(
-                persist_directory=self.persist_directory,
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                while batch := list(itertools.islice(documents, batch_size)):
+                    # Bound the batches in flight so a large corpus is never fully in memory
+                    if len(futures) >= max_workers:
+                        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            write(future)
+
+                    futures[executor.submit(self._embed_batch, [doc.page_content for doc in batch])] = batch
+                    total_documents += len(batch)
+
+                for future in as_completed(list(futures)):
+                    write(future)
+        except Exception:
+            # Batches are written as they are embedded, so a failure part-way through
+            # would leave a partial index that load_existing_vectorstore accepts as complete
+            self._discard_partial_index()
+            raise
+
+        if self.backend == "faiss" and self.vectorstore is not None:
+            self.vectorstore.save_local(self.persist_directory)
+
+        logger.info("Vector store initialized with %d property listings", total_documents)
+        logger.info("Persisted to: %s", self.persist_directory)
+
+    def _discard_partial_index(self) -> None:
+        """Drop an index whose ingest failed, so the next setup rebuilds it"""
+        if self.backend == "chroma" and self.vectorstore is not None:
+            try:
+                self.vectorstore.delete_collection()
+            except Exception as e:
+                logger.warning("Could not delete partially built collection: %s", e)
+        # A FAISS index is only saved once ingest completes, so there is nothing on disk to undo
+        self.vectorstore = None
+        self._doc_count = None
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch of texts into one contiguous (len(texts), dim) float32 array"""
+        return np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+
+    def _write_batch(self, batch: List[Document], embeddings: np.ndarray) -> None:
+        """Add a batch of documents with precomputed embeddings to the vector store"""
+        ids = [doc.metadata["id"] for doc in batch]
+        texts = [doc.page_content for doc in batch]
+        metadatas = [doc.metadata for doc in batch]
+
+        if self.backend == "chroma":
+            # Upsert so a rebuild replaces listings with the same id rather than skipping them
+            try:
+                self.vectorstore._collection.upsert(
+                    ids=ids,
+                    embeddings=embeddings,
+                    documents=texts,
+                    metadatas=metadatas
+                )
+            except ValueError:
+                # Older chromadb releases only accept embeddings as lists of floats
+                self.vectorstore._collection.upsert(
+                    ids=ids,
+                    embeddings=embeddings.tolist(),
+                    documents=texts,
+                    metadatas=metadatas
+                )
+            return
+
+        if self.vectorstore is None:
+            faiss, InMemoryDocstore, FAISS = _import_faiss()
+            dimension = embeddings.shape[1]
+            if self.fp16_vectors:
+                # Scalar-quantized storage; fp16 needs no training pass
+                index = faiss.IndexHNSWSQ(dimension, faiss.ScalarQuantizer.QT_fp16, FAISS_HNSW_M)
+            else:
+                index = faiss.IndexHNSWFlat(dimension, FAISS_HNSW_M)
+            self.vectorstore = FAISS(
                 embedding_function=self.embeddings,
-                collection_name="london_properties"
+                index=index,
+                docstore=InMemoryDocstore(),
+                index_to_docstore_id={}
             )
+        self.vectorstore.add_embeddings(zip(texts, embeddings), metadatas=metadatas, ids=ids)
+
+    def _document_count(self) -> int:
+        """Number of documents in the loaded vector store, counted once per load or ingest"""
+        if self._doc_count is None:
+            if self.backend == "chroma":
+                self._doc_count = self.vectorstore._collection.count()
+            else:
+                self._doc_count = self.vectorstore.index.ntotal
+        return self._doc_count
+
+    def load_existing_vectorstore(self) -> bool:
+        """Load existing vector store if it exists"""
+        self._search_ef = None
+        self._doc_count = None
+        try:
+            if self.backend == "chroma":
+                # Searches pass precomputed query vectors, so the collection needs no embedding function
+                self.vectorstore = self._open_chroma()
+            else:
+                _, _, FAISS = _import_faiss()
+                # The docstore is pickled alongside the index; it is only ever written by this class
+                self.vectorstore = FAISS.load_local(
+                    self.persist_directory,
+                    self.embeddings,
+                    allow_dangerous_deserialization=True
+                )
 
             # Test if the collection has documents
-            collection_count = self.vectorstore._collection.count()
+            collection_count = self._document_count()
             if collection_count > 0:
-                print(f"Loaded existing vector store with {collection_count} documents")
+                logger.info("Loaded existing vector store with %d documents", collection_count)
                 return True
             else:
-                print("Existing vector store is empty")
+                logger.info("Existing vector store is empty")
                 return False
 
         except Exception as e:
-            print(f"Could not load existing vector store: {e}")
+            logger.warning("Could not load existing vector store: %s", e)
             return False
 
-    def semantic_search(self, query: str, k: int = 5, filter_dict: Dict[str, Any] = None) -> List[Dict]:
-        """Perform semantic search on property listings"""
+    def semantic_search(
+        self,
+        query: str,
+        k: int = 5,
+        filter_dict: Dict[str, Any] = None,
+        ef_search: Optional[int] = None
+    ) -> List[Dict]:
+        """Perform semantic search on property listings
+
+        ef_search sets the HNSW candidate list size used by this and later searches on
+        the faiss backend. Larger values raise recall at the cost of query latency; it
+        should be at least k. When omitted the index keeps its current setting. Chroma
+        collections use CHROMA_SEARCH_EF, fixed when the collection is created.
+        """
+        if not self.vectorstore:
+            raise ValueError("Vector store not initialized. Call setup_vectorstore() first.")
+
+        # Perform similarity search, reusing the embedding if this query was seen before
+        return self.search_by_vector(self.embed_query(query), k=k, filter_dict=filter_dict, ef_search=ef_search)
+
+    def semantic_search_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        filter_dict: Dict[str, Any] = None,
+        ef_search: Optional[int] = None
+    ) -> List[List[Dict]]:
+        """Perform semantic search for several queries, embedding them in a single request"""
         if not self.vectorstore:
             raise ValueError("Vector store not initialized. Call setup_vectorstore() first.")
 
-        # Perform similarity search
-        if filter_dict:
-            results = self.vectorstore.similarity_search_with_score(
-                query=query,
-                k=k,
-                filter=filter_dict
+        self._set_search_ef(ef_search)
+
+        if not queries:
+            return []
+
+        # One embedding call for all queries not embedded recently
+        query_embeddings = self._embed_queries(queries)
+
+        if self.backend == "chroma":
+            # Chroma searches all query vectors in a single call
+            return self._query_collection(query_embeddings, k=k, filter_dict=filter_dict)
+        return [self.search_by_vector(embedding, k=k, filter_dict=filter_dict) for embedding in query_embeddings]
+
+    def search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 5,
+        filter_dict: Dict[str, Any] = None,
+        ef_search: Optional[int] = None
+    ) -> List[Dict]:
+        """Perform similarity search with an already computed query embedding"""
+        if not self.vectorstore:
+            raise ValueError("Vector store not initialized. Call setup_vectorstore() first.")
+
+        self._set_search_ef(ef_search)
+
+        if self.backend == "chroma":
+            return self._query_collection([embedding], k=k, filter_dict=filter_dict)[0]
+
+        results = self.vectorstore.similarity_search_with_score_by_vector(
+            embedding=embedding,
+            k=k,
+            filter=filter_dict
+        )
+        return self._format_results(results)
+
+    def _query_collection(
+        self,
+        query_embeddings: List[List[float]],
+        k: int,
+        filter_dict: Dict[str, Any] = None
+    ) -> List[List[Dict]]:
+        """Query the Chroma collection directly with several embeddings at once"""
+        response = self.vectorstore._collection.query(
+            query_embeddings=query_embeddings,
+            n_results=k,
+            where=filter_dict or None,
+            # Only the columns used below; never read the stored vectors back
+            include=["documents", "metadatas", "distances"]
+        )
+
+        return [
+            [
+                {
+                    "content": content,
+                    "metadata": metadata,
+                    "similarity_score": distance
+                }
+                for content, metadata, distance in zip(documents, metadatas, distances)
+            ]
+            for documents, metadatas, distances in zip(
+                response["documents"], response["metadatas"], response["distances"]
             )
-        else:
-            results = self.vectorstore.similarity_search_with_score(
-                query=query,
-                k=k
+        ]
+
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a search query, reusing the vector for query strings seen recently"""
+        return self._embed_queries([query])[0]
+
+    def _embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed search queries, sending the ones not seen recently in a single request
+
+        Query vectors are only kept in memory. They bypass CacheBackedEmbeddings so
+        one-off queries never accumulate in the on-disk document embedding cache.
+        """
+        misses = list(dict.fromkeys(query for query in queries if query not in self._query_embeddings))
+        if misses:
+            vectors = self.embeddings.underlying_embeddings.embed_documents(misses)
+            for query, vector in zip(misses, vectors):
+                self._query_embeddings[query] = tuple(vector)
+
+        embeddings = []
+        for query in queries:
+            self._query_embeddings.move_to_end(query)
+            embeddings.append(list(self._query_embeddings[query]))
+
+        while len(self._query_embeddings) > QUERY_EMBEDDING_CACHE_SIZE:
+            self._query_embeddings.popitem(last=False)
+        return embeddings
+
+    def _set_search_ef(self, ef_search: Optional[int]) -> None:
+        """Apply an HNSW ef_search value to the FAISS index, if given and not already set"""
+        if ef_search is None or ef_search == self._search_ef:
+            return
+
+        if self.backend == "chroma":
+            raise ValueError(
+                "ef_search is only supported by the faiss backend; Chroma collections "
+                "use CHROMA_SEARCH_EF, set when the collection is created"
             )
 
-        # Format results
+        self.vectorstore.index.hnsw.efSearch = ef_search
+        self._search_ef = ef_search
+
+    def search_and_personalize(self, query: str, preferences: Any, personalizer: Any, k: int = 5) -> List[Any]:
+        """Embed the query once, search with that vector and personalize the matches
+
+        The ListingPersonalizer is passed in rather than imported, since the
+        personalization module already depends on this one.
+        """
+        query_embedding = self.embed_query(query)
+        results = self.search_by_vector(query_embedding, k=k)
+        return personalizer.personalize_listings(results, preferences)
+
+    def _format_results(self, results: List[tuple]) -> List[Dict]:
+        """Convert (Document, score) pairs into plain result dicts"""
         formatted_results = []
         for doc, score in results:
             result = {
@@ -171,19 +638,17 @@ class PropertyVectorStore:
         if not force_rebuild and self.load_existing_vectorstore():
             return True
 
-        print("Setting up new vector store...")
+        logger.info("Setting up new vector store...")
 
-        # Load listings from JSON
-        listings = self.load_listings_from_json()
-        if not listings:
-            print("No listings found. Cannot create vector store.")
+        # Stream documents from the listings file as they are read
+        documents = self._iter_listing_documents()
+        first_document = next(documents, None)
+        if first_document is None:
+            logger.error("No listings found. Cannot create vector store.")
             return False
 
-        # Convert to documents
-        documents = self.create_documents(listings)
-
         # Initialize vector store
-        self.initialize_vectorstore(documents)
+        self.initialize_vectorstore(itertools.chain([first_document], documents))
 
         return True
 
@@ -193,9 +658,10 @@ class PropertyVectorStore:
             return {"error": "Vector store not initialized"}
 
         try:
-            total_docs = self.vectorstore._collection.count()
+            total_docs = self._document_count()
 
             return {
+                "backend": self.backend,
                 "total_documents": total_docs,
                 "persist_directory": self.persist_directory
             }
@@ -205,6 +671,7 @@ class PropertyVectorStore:
 
 def main():
     """Main function to set up the vector store"""
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
     print("=== London Property Vector Store Setup ===")
 
     # Initialize vector store
@@ -232,7 +699,7 @@ def main():
             print(f"Content preview: {result['content'][:200]}...")
 
     else:
-        print("Failed to set up vector store")
+        logger.error("Failed to set up vector store")
 
 
 if __name__ == "__main__":
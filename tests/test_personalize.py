@@ -0,0 +1,102 @@
+import asyncio
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import RunnableGenerator
+
+from personalization.personalize import ListingPersonalizer, _condense_listing
+from search.search import BuyerPreferences
+
+BASIC_INFO = """# Spacious Family Home in Richmond
+
+**Basic Info:**
+
+- Area/Postcode: Richmond, TW9. Close to the river.
+- Price: £1,250,000. Freehold.
+- Bedrooms: 4
+- Size: 1,900 sqft"""
+
+LISTING = BASIC_INFO + """
+
+**Property Description:**
+""" + " ".join(f"The house has original feature number {i}." for i in range(40)) + """ It has a large garden with a patio.
+
+**Area Description:**
+""" + " ".join(f"There is a local shop number {i}." for i in range(40)) + " The tube station is a short walk away."
+
+
+def test_condense_listing_keeps_title_first_basic_info_verbatim():
+    condensed = _condense_listing(LISTING, "garden tube", max_chars=600)
+
+    assert condensed.startswith(BASIC_INFO + "\n\n")
+    assert "**Property Description:**" in condensed
+    assert "**Area Description:**" in condensed
+    assert "It has a large garden with a patio." in condensed
+    assert "The tube station is a short walk away." in condensed
+    assert len(condensed) <= 600
+
+
+def test_condense_listing_leaves_short_listings_alone():
+    assert _condense_listing(BASIC_INFO, "garden", max_chars=600) == BASIC_INFO
+
+
+class _ConstantEmbeddings(Embeddings):
+    """Embeds every text to the same vector, so every pair of listings looks like a duplicate"""
+
+    def embed_documents(self, texts):
+        return [[1.0, 0.0] for _ in texts]
+
+    def embed_query(self, text):
+        return [1.0, 0.0]
+
+
+def _personalizer_with_fake_llm(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    personalizer = ListingPersonalizer(cache={}, embeddings=_ConstantEmbeddings())
+    calls = []
+
+    async def fake_stream(inputs):
+        calls.append(inputs)
+        yield f"Personalized description {len(calls)}"
+
+    personalizer._chain = RunnableGenerator(fake_stream)
+    return personalizer, calls
+
+
+def _listing(price: str, description: str) -> str:
+    return f"**Basic Info:**\n- Price: {price}\n- Bedrooms: 2\n\n**Property Description:**\n{description}"
+
+
+def test_semantic_cache_never_reuses_a_description_across_different_basic_info(monkeypatch):
+    personalizer, calls = _personalizer_with_fake_llm(monkeypatch)
+    base_inputs = personalizer._preference_inputs(BuyerPreferences(preferred_areas="Clapham"))
+
+    async def run():
+        first = await personalizer._agenerate_personalized_description(
+            _listing("£500,000", "A bright flat."), base_inputs, "young_professionals"
+        )
+        second = await personalizer._agenerate_personalized_description(
+            _listing("£650,000", "A bright flat."), base_inputs, "young_professionals"
+        )
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert len(calls) == 2
+    assert first != second
+
+
+def test_semantic_cache_reuses_a_description_for_the_same_basic_info(monkeypatch):
+    personalizer, calls = _personalizer_with_fake_llm(monkeypatch)
+    base_inputs = personalizer._preference_inputs(BuyerPreferences(preferred_areas="Clapham"))
+
+    async def run():
+        first = await personalizer._agenerate_personalized_description(
+            _listing("£500,000", "A bright flat."), base_inputs, "young_professionals"
+        )
+        second = await personalizer._agenerate_personalized_description(
+            _listing("£500,000", "A bright, airy flat."), base_inputs, "young_professionals"
+        )
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert len(calls) == 1
+    assert first == second
@@ -0,0 +1,41 @@
+import sqlite3
+
+import orjson
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from vector_store.store import CHROMA_SEARCH_EF, PropertyVectorStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """A Chroma-backed store over a small listings file, with offline embeddings"""
+    # Listings and the embedding cache live at paths relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "listings.json").write_bytes(orjson.dumps({
+        "family_areas": ["A three bedroom house in Richmond", "A Victorian terrace in Barnes"],
+        "young_professionals": ["A modern flat in Clapham near the tube"],
+    }))
+
+    store = PropertyVectorStore(persist_directory=str(tmp_path / "chroma_db"))
+    store._embeddings = DeterministicFakeEmbedding(size=8)
+    return store
+
+
+def test_setup_vectorstore_creates_collection_with_search_ef(store, tmp_path):
+    assert store.setup_vectorstore()
+
+    assert store.vectorstore._collection.metadata["hnsw:search_ef"] == CHROMA_SEARCH_EF
+
+    # Chroma copies the HNSW settings into the vector segment when the collection is created
+    conn = sqlite3.connect(tmp_path / "chroma_db" / "chroma.sqlite3")
+    try:
+        segment_values = [
+            value for (value,) in conn.execute(
+                "SELECT int_value FROM segment_metadata WHERE key = 'hnsw:search_ef'"
+            )
+        ]
+    finally:
+        conn.close()
+    assert segment_values == [CHROMA_SEARCH_EF]